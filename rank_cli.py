@@ -0,0 +1,84 @@
+"""Rank a titles file from the command line with the settings tuned in the app.
+
+The settings are either the JSON file exported from the Import/Export page or
+the `conf` parameter of the app URL (the whole URL works too). Titles are read
+from a `.txt` file of `raw_title<TAB>correct_title` lines or a `.csv` file with
+`raw_title` and `correct_title` columns, and ranked a chunk at a time, so large
+files do not need to fit in memory. Every title gives one JSON line.
+
+    python rank_cli.py titles.txt --settings rtn_settings.json -o results.jsonl
+    python rank_cli.py titles.csv --conf 'https://ranktorrentname.streamlit.app/?conf=...'
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+
+from rtn_engine import RANK_PROFILES, CompiledSettings, iter_ranked_rows, iter_title_file, load_settings
+
+
+def read_settings(args):
+    """Settings model dict and remove_trash default from the `--settings` or `--conf` argument."""
+    settings_json = None
+    if args.settings:
+        with open(args.settings, encoding='utf-8') as f:
+            settings_json = f.read()
+    return load_settings(settings_json, args.conf)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank torrent titles with RTN settings from the app.")
+    parser.add_argument("titles", help="titles file (.txt or .csv), - for stdin")
+    parser.add_argument("--format", choices=["txt", "csv"],
+                        help="format of the titles file, defaults to its extension (txt for stdin)")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--settings", help="settings JSON exported from the Import/Export page")
+    source.add_argument("--conf", help="conf blob or full URL of the app")
+    parser.add_argument("--profile", choices=RANK_PROFILES,
+                        help="ranking profile, defaults to the profile of the settings")
+    parser.add_argument("--remove-trash", action=argparse.BooleanOptionalAction, default=None,
+                        help="mark titles RTN would drop as not kept (default: the conf value, or yes)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="titles ranked at a time")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file, - for stdout")
+    args = parser.parse_args(argv)
+
+    try:
+        settings_model, remove_trash = read_settings(args)
+        compiled = CompiledSettings(settings_model, args.profile)
+    except Exception as err:
+        parser.error(f"invalid settings: {err}")
+    if args.remove_trash is not None:
+        remove_trash = args.remove_trash
+
+    titles_file = output = None
+    ranked = kept = 0
+    started = time.perf_counter()
+    try:
+        titles_file = sys.stdin if args.titles == "-" else open(args.titles, encoding='utf-8', newline='')
+        output = sys.stdout if args.output == "-" else open(args.output, "w", encoding='utf-8')
+        titles_format = f".{args.format}" if args.format else args.titles
+        rows = iter_ranked_rows(compiled.rtn, iter_title_file(titles_file, titles_format),
+                                chunk_size=args.chunk_size, remove_trash=remove_trash,
+                                speed_mode=compiled.speed_mode)
+        for row in rows:
+            output.write(json.dumps(row, ensure_ascii=False) + "\n")
+            ranked += 1
+            kept += bool(row['kept'])
+    except (OSError, ValueError, csv.Error) as err:
+        # Missing or unreadable files, malformed CSV or text that is not UTF-8
+        parser.error(f"cannot rank titles: {err}")
+    finally:
+        if titles_file not in (None, sys.stdin):
+            titles_file.close()
+        if output not in (None, sys.stdout):
+            output.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"Ranked {ranked:,} titles with the {compiled.profile} profile in {elapsed:.1f}s "
+          f"({ranked / max(elapsed, 1e-9):,.0f} titles/s), {kept:,} kept", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
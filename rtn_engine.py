@@ -0,0 +1,1794 @@
+"""Batch ranking helpers shared by the Streamlit pages.
+
+Nothing in here imports streamlit, so the same code can be reused outside of a
+script run.
+"""
+from __future__ import annotations
+
+import contextlib
+import csv
+import functools
+import hashlib
+import heapq
+import io
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+from typing import TYPE_CHECKING, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import regex
+from RTN import RTN
+from RTN.exceptions import GarbageTorrent
+from RTN.extras import get_lev_ratio
+from RTN.fetch import check_fetch
+from RTN.parser import parse
+from RTN.ranker import get_rank
+from RTN.models import (
+    BaseRankingModel, ParsedData, SettingsModel, Torrent,
+    ResolutionConfig, OptionsConfig, LanguagesConfig, CustomRanksConfig,
+    QualityRankModel, RipsRankModel, HdrRankModel, AudioRankModel, ExtrasRankModel, TrashRankModel
+)
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# RTN requires a valid SHA-1 infohash even though we only rank titles
+PLACEHOLDER_INFOHASH = "BE417768B5C3C5C1D9BCB2E7C119196DD76B5570"
+
+# Titles covering every ranked attribute, used to check the scoring engine
+REFERENCE_TITLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "reference_titles.txt")
+
+# Number of parsed titles kept in memory by default
+DEFAULT_PARSE_CACHE_SIZE = 50_000
+# SQLite file of the conf store behind short share links
+CONF_STORE_PATH = os.environ.get(
+    "RTN_CONF_STORE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "conf_store.sqlite3")
+)
+# Hex digits of the conf hash used as short key
+CONF_KEY_LENGTH = 16
+# Confs kept in the conf store, the least recently used ones are evicted past that
+CONF_STORE_MAX_ROWS = int(os.environ.get("RTN_CONF_STORE_MAX_ROWS", 10_000))
+# Version tag of the compact conf encoding, conf blobs without one hold the whole conf
+CONF_VERSION = 2
+# Frozen conf the delta of each conf version is taken against, `{version}` filled in. The
+# delta must not depend on the defaults of the installed RTN, or an upgrade changing a
+# default would silently change the settings of every existing link
+CONF_BASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "conf_base_v{version}.json")
+
+# Time budget in seconds for one user pattern on one title
+PATTERN_TIMEOUT = 0.1
+PATTERN_FIELDS = ("require", "exclude", "preferred")
+
+# Columns of a ranked row, in display order
+RESULT_COLUMNS = [
+    "raw_title", "correct_title", "parsed_title", "rank", "fetch", "kept",
+    "lev_ratio", "resolution", "failing_reason", "slow_patterns"
+]
+# Columns of a best per media item row
+MEDIA_COLUMNS = [
+    "media", "place", "raw_title", "rank", "resolution", "candidates", "correct_title", "parsed_title", "slow_patterns"
+]
+# Columns of a settings diff row, side A being the current settings and B the candidate
+DIFF_COLUMNS = [
+    "raw_title", "correct_title", "parsed_title", "change", "rank_a", "rank_b", "position_a", "position_b",
+    "position_shift", "fetch_a", "fetch_b", "kept_a", "kept_b", "failing_reason_a", "failing_reason_b",
+    "slow_patterns_a", "slow_patterns_b"
+]
+
+
+# From https://github.com/rivenmedia/riven/blob/0dbc9f70161dc6cd5f219e81a4424b15aa6fbf14/backend/program/settings/versions.py
+
+# Default ranking models from RTN
+class DefaultRanking(BaseRankingModel):
+    """Default ranking model preset that covers the most common use cases."""
+    # quality
+    av1: int = 0
+    avc: int = 500
+    bluray: int = 100
+    dvd: int = -1000
+    hdtv: int = -1000
+    hevc: int = 500
+    mpeg: int = -100
+    remux: int = -10000
+    vhs: int = -10000
+    web: int = 150
+    webdl: int = 5000
+    webmux: int = -10000
+    xvid: int = -10000
+    pdtv: int = -10000
+
+    # rips
+    bdrip: int = -1000
+    brrip: int = -1000
+    dvdrip: int = -1000
+    hdrip: int = -1000
+    ppvrip: int = -1000
+    tvrip: int = -10000
+    uhdrip: int = -1000
+    vhsrip: int = -10000
+    webdlrip: int = -10000
+    webrip: int = 30
+
+    # hdr
+    bit_10: int = 5
+    dolby_vision: int = 50
+    hdr: int = 50
+    hdr10plus: int = 0
+    sdr: int = 0
+
+    # audio
+    aac: int = 250
+    ac3: int = 30
+    atmos: int = 400
+    dolby_digital: int = 0
+    dolby_digital_plus: int = 0
+    dts_lossy: int = 600
+    dts_lossless: int = 0
+    eac3: int = 250
+    flac: int = 0
+    mono: int = -10000
+    mp3: int = -10000
+    stereo: int = 0
+    surround: int = 0
+    truehd: int = -100
+
+    # extras
+    three_d: int = -10000
+    converted: int = -1250
+    documentary: int = -250
+    dubbed: int = 0
+    edition: int = 100
+    hardcoded: int = 0
+    network: int = 300
+    proper: int = 1000
+    repack: int = 1000
+    retail: int = 0
+    site: int = -10000
+    subbed: int = 0
+    upscaled: int = -10000
+    scene: int = 2000
+
+    # trash
+    cam: int = -10000
+    clean_audio: int = -10000
+    r5: int = -10000
+    satrip: int = -10000
+    screener: int = -10000
+    size: int = -10000
+    telecine: int = -10000
+    telesync: int = -10000
+    adult: int = -10000
+
+
+class BestRanking(BaseRankingModel):
+    """Ranking model preset that prioritizes the highest quality and most desirable attributes."""
+    # quality
+    av1: int = 500
+    avc: int = 500
+    bluray: int = 100
+    dvd: int = -5000
+    hdtv: int = -5000
+    hevc: int = 500
+    mpeg: int = -1000
+    remux: int = 10000
+    vhs: int = -10000
+    web: int = 100
+    webdl: int = 200
+    webmux: int = -10000
+    xvid: int = -10000
+    pdtv: int = -10000
+
+    # rips
+    bdrip: int = -5000
+    brrip: int = -10000
+    dvdrip: int = -5000
+    hdrip: int = -10000
+    ppvrip: int = -10000
+    tvrip: int = -10000
+    uhdrip: int = -5000
+    vhsrip: int = -10000
+    webdlrip: int = -10000
+    webrip: int = -1000
+
+    # hdr
+    bit_10: int = 100
+    dolby_vision: int = 3000
+    hdr: int = 2000
+    hdr10plus: int = 2100
+    sdr: int = 0
+
+    # audio
+    aac: int = 100
+    ac3: int = 50
+    atmos: int = 1000
+    dolby_digital: int = 0
+    dolby_digital_plus: int = 0
+    dts_lossy: int = 100
+    dts_lossless: int = 2000
+    eac3: int = 150
+    flac: int = 0
+    mono: int = -1000
+    mp3: int = -1000
+    stereo: int = 0
+    surround: int = 0
+    truehd: int = 2000
+
+    # extras
+    three_d: int = -10000
+    converted: int = -1000
+    documentary: int = -250
+    dubbed: int = -1000
+    edition: int = 100
+    hardcoded: int = 0
+    network: int = 0
+    proper: int = 20
+    repack: int = 20
+    retail: int = 0
+    site: int = -10000
+    subbed: int = 0
+    upscaled: int = -10000
+    scene: int = 0
+
+    # trash
+    cam: int = -10000
+    clean_audio: int = -10000
+    r5: int = -10000
+    satrip: int = -10000
+    screener: int = -10000
+    size: int = -10000
+    telecine: int = -10000
+    telesync: int = -10000
+    adult: int = -10000
+
+
+# Available ranking models
+rtn_rank_models = {
+    "default": DefaultRanking(),
+    "best": BestRanking(),
+    "custom": BaseRankingModel(),
+}
+RANK_PROFILES = list(rtn_rank_models)
+
+
+def get_settings_model(settings_model):
+    # Convert the custom ranks configuration
+    custom_ranks_config = CustomRanksConfig(
+        quality=QualityRankModel(**settings_model.get('custom_ranks', {}).get('quality', {})),
+        rips=RipsRankModel(**settings_model.get('custom_ranks', {}).get('rips', {})),
+        hdr=HdrRankModel(**settings_model.get('custom_ranks', {}).get('hdr', {})),
+        audio=AudioRankModel(**settings_model.get('custom_ranks', {}).get('audio', {})),
+        extras=ExtrasRankModel(**settings_model.get('custom_ranks', {}).get('extras', {})),
+        trash=TrashRankModel(**settings_model.get('custom_ranks', {}).get('trash', {}))
+    )
+
+    # Get resolution configuration
+    resolution_config = ResolutionConfig(**settings_model.get('resolutions', {}))
+
+    # Get options configuration
+    options_config = OptionsConfig(**settings_model.get('options', {}))
+
+    # Get languages configuration
+    languages_config = LanguagesConfig(**settings_model.get('languages', {}))
+
+    return SettingsModel(
+        profile=settings_model['profile'],
+        require=settings_model['require'],
+        exclude=settings_model['exclude'],
+        preferred=settings_model['preferred'],
+        resolutions=resolution_config,
+        options=options_config,
+        languages=languages_config,
+        custom_ranks=custom_ranks_config
+    )
+
+
+def settings_hash(settings_model: dict, profile: str = None) -> str:
+    """Stable hash of a conf settings dict and the ranking profile it is used with."""
+    payload = json.dumps(
+        {"profile": profile or settings_model.get('profile', 'default'), "settings_model": settings_model},
+        sort_keys=True, separators=(',', ':'), default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+@functools.lru_cache(maxsize=1)
+def _lz():
+    # lzstring is only needed once a conf is read from or written to a URL
+    import lzstring
+    return lzstring.LZString()
+
+
+def compress_string(string: str) -> str:
+    """Compress a string using LZString and make it URL safe."""
+    try:
+        # Use compressToEncodedURIComponent instead of compressToBase64
+        compressed = _lz().compressToEncodedURIComponent(string)
+        if compressed:
+            return compressed
+        return string
+    except Exception:
+        return string
+
+
+def decompress_string(string: str, default_value: str = '') -> str:
+    """Decompress a URL-safe LZString compressed string."""
+    try:
+        decompressed = _lz().decompressFromEncodedURIComponent(string)
+        return decompressed if decompressed else default_value
+    except Exception:
+        return default_value
+
+
+def generate_initial_conf():
+    # Initialize with default settings
+    default_settings = SettingsModel(
+        profile="default",
+        require=[],
+        exclude=[],
+        preferred=[],
+        resolutions=ResolutionConfig(
+            # Enable common resolutions by default
+            r2160p=True,  # 4K
+            r1080p=True,  # 1080p
+            r720p=True,   # 720p
+            r480p=False,  # 480p
+            r360p=False,  # 360p
+            unknown=True  # Allow unknown resolutions
+        ),
+        options=OptionsConfig(),
+        languages=LanguagesConfig(),
+        custom_ranks=CustomRanksConfig()
+    ).model_dump()
+
+    return {
+        "titles": [{
+            "raw_title": "Example.Movie.2020.1080p.BluRay.x264-Example",
+            "correct_title": ""
+        }],
+        "remove_trash": True,
+        "settings_model": default_settings
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _conf_base_json(version: int) -> str:
+    try:
+        with open(CONF_BASE_PATH.format(version=version), encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        raise ValueError(f"Unknown conf version {version}") from None
+
+
+def conf_base(version: int = CONF_VERSION) -> dict:
+    """Fresh copy of the frozen conf the deltas of `version` are taken against."""
+    return json.loads(_conf_base_json(version))
+
+
+def _delta_key(key: str) -> str:
+    # Keys starting with `-` get one more, `-` alone marks the removed keys
+    return '-' + key if key.startswith('-') else key
+
+
+def conf_delta(conf: dict, base: dict) -> dict:
+    """Parts of `conf` that differ from `base`, recursing into dicts.
+
+    Keys of `base` missing from a dict of `conf` are listed under `-`. Keys of
+    `conf` starting with `-` are escaped with one more `-`, so they cannot be
+    mistaken for that list.
+    """
+    delta = {}
+    for key, value in conf.items():
+        if key not in base:
+            delta[_delta_key(key)] = value
+        elif isinstance(value, dict) and isinstance(base[key], dict):
+            nested = conf_delta(value, base[key])
+            if nested:
+                delta[_delta_key(key)] = nested
+        elif value != base[key]:
+            delta[_delta_key(key)] = value
+    removed = [key for key in base if key not in conf]
+    if removed:
+        delta['-'] = removed
+    return delta
+
+
+def apply_conf_delta(base: dict, delta: dict) -> dict:
+    """Apply a `conf_delta` to `base` in place and return it."""
+    for key, value in delta.items():
+        if key == '-':
+            for removed in value:
+                base.pop(removed, None)
+            continue
+        if key.startswith('-'):
+            key = key[1:]
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            apply_conf_delta(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+
+def encode_conf(conf: dict) -> str:
+    """Compressed, URL safe conf, holding only what differs from the frozen base conf of `CONF_VERSION`."""
+    delta = conf_delta(conf, conf_base())
+    return compress_string(json.dumps({"v": CONF_VERSION, "d": delta}, separators=(',', ':')))
+
+
+def decode_conf_json(conf_json: str):
+    """Conf from the decompressed JSON of `encode_conf`, or of a whole conf from older URLs.
+
+    The delta is applied to the base conf of the version it was encoded with,
+    whatever RTN version is installed now.
+    """
+    data = json.loads(conf_json)
+    if isinstance(data, dict) and set(data) == {"v", "d"} and isinstance(data["v"], int):
+        return apply_conf_delta(conf_base(data["v"]), data["d"] or {})
+    return data
+
+
+def decode_conf(blob: str, store: "ConfStore" = None) -> dict:
+    """Decode the `conf` query parameter of the app, given alone or as part of the app URL.
+
+    An app URL with a short `c` key instead is resolved from `store`, by default
+    the conf store at `CONF_STORE_PATH`.
+    """
+    found = regex.search(r"[?&]c=([0-9a-f]+)", blob)
+    if found:
+        conf = (store or ConfStore()).get(found.group(1))
+        if conf is None:
+            raise ValueError(f"No configuration stored under {found.group(1)}")
+    else:
+        found = regex.search(r"[?&]conf=([^&#]*)", blob)
+        if found:
+            # Not unquote_plus, `+` is part of the LZString alphabet
+            blob = urllib.parse.unquote(found.group(1))
+        conf_json = decompress_string(blob.strip())
+        if not conf_json:
+            raise ValueError("Failed to decompress configuration")
+        conf = decode_conf_json(conf_json)
+    if not isinstance(conf, dict) or not isinstance(conf.get('settings_model'), dict):
+        raise ValueError("Configuration has no settings_model")
+    return conf
+
+
+def load_settings(settings_json: str = None, conf: str = None) -> Tuple[dict, bool]:
+    """Settings model dict and remove_trash of an exported settings JSON, or else of a conf blob or app URL.
+
+    Exported settings carry no remove_trash option, it defaults to True for them.
+    """
+    if settings_json is not None:
+        # Validate first for a readable error, the exported JSON is then used as the settings dict
+        SettingsModel.model_validate_json(settings_json)
+        return json.loads(settings_json), True
+    if conf and conf.strip():
+        decoded = decode_conf(conf)
+        return decoded['settings_model'], bool(decoded.get('remove_trash', True))
+    raise ValueError("No settings JSON or conf given")
+
+
+class ConfStore:
+    """Content addressed confs in SQLite, for share links too long for the URL.
+
+    A conf is keyed by the hash of its canonical JSON, so storing the same conf
+    twice keeps one row. The store holds at most `max_rows` confs: storing one
+    more evicts the confs least recently stored or read, whose short links stop
+    resolving. Each call opens its own connection, a store can be shared across
+    threads.
+    """
+
+    def __init__(self, path: str = CONF_STORE_PATH, max_rows: int = CONF_STORE_MAX_ROWS):
+        self.path = path
+        self.max_rows = max_rows
+        with contextlib.closing(self._connect()) as db, db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS confs (key TEXT PRIMARY KEY, conf TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            # Stores made before eviction have no last_used column
+            columns = {row[1] for row in db.execute("PRAGMA table_info(confs)")}
+            if "last_used" not in columns:
+                db.execute("ALTER TABLE confs ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+                db.execute("UPDATE confs SET last_used = created")
+            db.execute("CREATE INDEX IF NOT EXISTS confs_last_used ON confs (last_used)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    @staticmethod
+    def canonical_json(conf: dict) -> str:
+        return json.dumps(conf, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+    def put(self, conf: dict) -> str:
+        """Store `conf` and return its short key, evicting the least recently used confs past `max_rows`."""
+        conf_json = self.canonical_json(conf)
+        key = hashlib.sha256(conf_json.encode('utf-8')).hexdigest()[:CONF_KEY_LENGTH]
+        now = time.time()
+        with contextlib.closing(self._connect()) as db, db:
+            db.execute(
+                "INSERT INTO confs (key, conf, created, last_used) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET last_used = excluded.last_used",
+                (key, conf_json, now, now)
+            )
+            db.execute(
+                "DELETE FROM confs WHERE key IN (SELECT key FROM confs ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,)
+            )
+        return key
+
+    def get(self, key: str) -> Optional[dict]:
+        """Conf stored under `key`, None if there is none or it was evicted."""
+        with contextlib.closing(self._connect()) as db, db:
+            row = db.execute("SELECT conf FROM confs WHERE key = ?", (key,)).fetchone()
+            if row:
+                db.execute("UPDATE confs SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0]) if row else None
+
+    def __len__(self):
+        with contextlib.closing(self._connect()) as db:
+            return db.execute("SELECT COUNT(*) FROM confs").fetchone()[0]
+
+
+class StageTimer:
+    """Wall time of named stages of a run.
+
+    Stages can be nested, each record keeps its nesting depth. Stages can be
+    tagged with the test case they belong to, nested stages inherit the tag.
+    """
+    enabled = True
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.records = []
+        self._depth = 0
+        self._case = None
+
+    @contextlib.contextmanager
+    def stage(self, name: str, case: str = None):
+        depth, outer_case = self._depth, self._case
+        case = case or outer_case
+        self._depth, self._case = depth + 1, case
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth, self._case = depth, outer_case
+            self.records.append({"stage": name, "case": case, "depth": depth,
+                                 "offset": started - self.started,
+                                 "seconds": time.perf_counter() - started})
+
+
+class _NullTimer:
+    """Stand-in for a disabled StageTimer, its stages cost a method call and nothing else."""
+    enabled = False
+    records = ()
+    _stage = contextlib.nullcontext()
+
+    def stage(self, name: str, case: str = None):
+        return self._stage
+
+
+NULL_TIMER = _NullTimer()
+
+
+class CompiledSettings:
+    """Everything needed to rank titles for one configuration, built once."""
+
+    def __init__(self, settings_model: dict, profile: str = None, timer: StageTimer = NULL_TIMER):
+        self.profile = profile or settings_model.get('profile', 'default')
+        self.key = settings_hash(settings_model, self.profile)
+        with timer.stage("get_settings_model"):
+            self.settings = get_settings_model({**settings_model, 'profile': self.profile})
+        self.ranking_model = rtn_rank_models.get(self.profile, DefaultRanking())
+        with timer.stage("RTN construction"):
+            self.rtn = RTN(settings=self.settings, ranking_model=self.ranking_model)
+        self.speed_mode = self.settings.options.get("enable_fetch_speed_mode", True)
+
+
+class ParseCache:
+    """Bounded LRU cache of parsed titles.
+
+    Parsing only depends on the raw title, not on the ranking settings, so a
+    settings change only has to re-score titles that are already parsed. The
+    feature row of a title does not depend on the settings either, it is kept
+    with the parsed title once computed.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_PARSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def parse(self, raw_title: str) -> ParsedData:
+        with self._lock:
+            entry = self._entries.get(raw_title)
+            if entry is not None:
+                self._entries.move_to_end(raw_title)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Parse outside of the lock, errors are not cached
+        data = parse(raw_title)
+        if self.maxsize > 0:
+            with self._lock:
+                # [parsed title, feature row once computed]
+                self._entries[raw_title] = [data, None]
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return data
+
+    def features(self, data: ParsedData) -> Tuple[int, ...]:
+        """Feature row of a parsed title, computed once while the title is cached."""
+        # Read without the lock, a stale miss only computes the row again
+        entry = self._entries.get(data.raw_title)
+        if entry is not None and entry[0] is data and entry[1] is not None:
+            return entry[1]
+        row = tuple(feature_row(data))
+        with self._lock:
+            entry = self._entries.get(data.raw_title)
+            if entry is not None and entry[0] is data:
+                entry[1] = row
+        return row
+
+    def resize(self, maxsize: int):
+        with self._lock:
+            self.maxsize = max(int(maxsize), 0)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+# Shared by every session of the app process
+parse_cache = ParseCache()
+
+
+def rank_torrent(rtn: RTN, raw_title: str, infohash: str, correct_title: str = "",
+                 remove_trash: bool = False, speed_mode: bool = True) -> Torrent:
+    """Same as `RTN.rank`, but parses through the shared parse cache."""
+    if not raw_title or not infohash:
+        raise ValueError("Both the title and infohash must be provided.")
+
+    if len(infohash) != 40:
+        raise GarbageTorrent("The infohash must be a valid SHA-1 hash and 40 characters in length.")
+
+    parsed_data = parse_cache.parse(raw_title)
+
+    lev_ratio = 0.0
+    if correct_title:
+        lev_ratio = get_lev_ratio(correct_title, parsed_data.parsed_title, rtn.lev_threshold, {})
+
+    is_fetchable, failed_keys = check_fetch(parsed_data, rtn.settings, speed_mode)
+    rank = get_rank(parsed_data, rtn.settings, rtn.ranking_model)
+
+    if remove_trash:
+        if not is_fetchable:
+            raise GarbageTorrent(f"'{parsed_data.raw_title}' denied by: {', '.join(failed_keys)}")
+        if correct_title and lev_ratio < rtn.lev_threshold:
+            raise GarbageTorrent(f"'{raw_title}' does not match the correct title. correct title: '{correct_title}', parsed title: '{parsed_data.parsed_title}'")
+
+    if rank < rtn.settings.options["remove_ranks_under"]:
+        raise GarbageTorrent(f"'{raw_title}' does not meet the minimum rank requirement, got rank of {rank}")
+
+    return Torrent(
+        infohash=infohash,
+        raw_title=raw_title,
+        data=parsed_data,
+        fetch=is_fetchable,
+        rank=rank,
+        lev_ratio=lev_ratio
+    )
+
+
+# Attribute columns of the feature matrix: (category, key, ranking model attribute).
+# The weight of a column is the ranking model attribute, or the custom rank of
+# `settings.custom_ranks[category][key]` when its override is enabled.
+# This mirrors RTN.ranker exactly, including its quirks (3D uses the remux rank).
+FEATURE_COLUMNS = [
+    # quality
+    ("quality", "av1", "av1"), ("quality", "avc", "avc"), ("quality", "bluray", "bluray"),
+    ("quality", "hdtv", "hdtv"), ("quality", "hevc", "hevc"), ("quality", "mpeg", "mpeg"),
+    ("quality", "remux", "remux"), ("quality", "vhs", "vhs"), ("quality", "web", "web"),
+    ("quality", "webdl", "webdl"), ("quality", "webmux", "webmux"), ("quality", "xvid", "xvid"),
+    # rips
+    ("rips", "bdrip", "bdrip"), ("rips", "brrip", "brrip"), ("rips", "dvdrip", "dvdrip"),
+    ("rips", "hdrip", "hdrip"), ("rips", "ppvrip", "ppvrip"), ("rips", "satrip", "satrip"),
+    ("rips", "tvrip", "tvrip"), ("rips", "uhdrip", "uhdrip"), ("rips", "vhsrip", "vhsrip"),
+    ("rips", "webdlrip", "webdlrip"), ("rips", "webrip", "webrip"),
+    # hdr
+    ("hdr", "10bit", "bit_10"), ("hdr", "dolby_vision", "dolby_vision"), ("hdr", "hdr", "hdr"),
+    ("hdr", "hdr10plus", "hdr10plus"), ("hdr", "sdr", "sdr"),
+    # audio
+    ("audio", "aac", "aac"), ("audio", "ac3", "ac3"), ("audio", "atmos", "atmos"),
+    ("audio", "dolby_digital", "dolby_digital"), ("audio", "dolby_digital_plus", "dolby_digital_plus"),
+    ("audio", "dts_lossy", "dts_lossy"), ("audio", "dts_lossless", "dts_lossless"),
+    ("audio", "eac3", "eac3"), ("audio", "flac", "flac"), ("audio", "mono", "mono"),
+    ("audio", "mp3", "mp3"), ("audio", "stereo", "stereo"), ("audio", "surround", "surround"),
+    ("audio", "truehd", "truehd"),
+    # extras
+    ("extras", "three_d", "remux"), ("extras", "converted", "converted"),
+    ("extras", "documentary", "documentary"), ("extras", "dubbed", "dubbed"),
+    ("extras", "edition", "edition"), ("extras", "hardcoded", "hardcoded"),
+    ("extras", "network", "network"), ("extras", "proper", "proper"), ("extras", "repack", "repack"),
+    ("extras", "retail", "retail"), ("extras", "scene", "scene"), ("extras", "site", "site"),
+    ("extras", "subbed", "subbed"), ("extras", "upscaled", "upscaled"),
+    # trash
+    ("trash", "cam", "cam"), ("trash", "clean_audio", "clean_audio"), ("trash", "pdtv", "pdtv"),
+    ("trash", "r5", "r5"), ("trash", "screener", "screener"), ("trash", "size", "size"),
+    ("trash", "telecine", "telecine"), ("trash", "telesync", "telesync"),
+]
+COLUMN_INDEX = {(category, key): i for i, (category, key, _) in enumerate(FEATURE_COLUMNS)}
+
+# Parsed value -> feature column, for each parsed attribute
+QUALITY_COLUMNS = {
+    "WEB": COLUMN_INDEX["quality", "web"],
+    "WEB-DL": COLUMN_INDEX["quality", "webdl"],
+    "BluRay": COLUMN_INDEX["quality", "bluray"],
+    "HDTV": COLUMN_INDEX["quality", "hdtv"],
+    "VHS": COLUMN_INDEX["quality", "vhs"],
+    "WEBMux": COLUMN_INDEX["quality", "webmux"],
+    "BluRay REMUX": COLUMN_INDEX["quality", "remux"],
+    "REMUX": COLUMN_INDEX["quality", "remux"],
+    "WEBRip": COLUMN_INDEX["rips", "webrip"],
+    "WEB-DLRip": COLUMN_INDEX["rips", "webdlrip"],
+    "UHDRip": COLUMN_INDEX["rips", "uhdrip"],
+    "HDRip": COLUMN_INDEX["rips", "hdrip"],
+    "DVDRip": COLUMN_INDEX["rips", "dvdrip"],
+    "BDRip": COLUMN_INDEX["rips", "bdrip"],
+    "BRRip": COLUMN_INDEX["rips", "brrip"],
+    "VHSRip": COLUMN_INDEX["rips", "vhsrip"],
+    "PPVRip": COLUMN_INDEX["rips", "ppvrip"],
+    "SATRip": COLUMN_INDEX["rips", "satrip"],
+    "TVRip": COLUMN_INDEX["rips", "tvrip"],
+    "TeleCine": COLUMN_INDEX["trash", "telecine"],
+    "TeleSync": COLUMN_INDEX["trash", "telesync"],
+    "SCR": COLUMN_INDEX["trash", "screener"],
+    "R5": COLUMN_INDEX["trash", "r5"],
+    "CAM": COLUMN_INDEX["trash", "cam"],
+    "PDTV": COLUMN_INDEX["trash", "pdtv"],
+}
+CODEC_COLUMNS = {codec: COLUMN_INDEX["quality", codec] for codec in ("avc", "hevc", "xvid", "av1", "mpeg")}
+HDR_COLUMNS = {
+    "DV": COLUMN_INDEX["hdr", "dolby_vision"],
+    "HDR": COLUMN_INDEX["hdr", "hdr"],
+    "HDR10+": COLUMN_INDEX["hdr", "hdr10plus"],
+    "SDR": COLUMN_INDEX["hdr", "sdr"],
+}
+CHANNEL_COLUMNS = {
+    "5.1": COLUMN_INDEX["audio", "surround"],
+    "7.1": COLUMN_INDEX["audio", "surround"],
+    "stereo": COLUMN_INDEX["audio", "stereo"],
+    "2.0": COLUMN_INDEX["audio", "stereo"],
+    "mono": COLUMN_INDEX["audio", "mono"],
+}
+AUDIO_COLUMNS = {
+    "AAC": COLUMN_INDEX["audio", "aac"],
+    "AC3": COLUMN_INDEX["audio", "ac3"],
+    "Atmos": COLUMN_INDEX["audio", "atmos"],
+    "Dolby Digital": COLUMN_INDEX["audio", "dolby_digital"],
+    "Dolby Digital Plus": COLUMN_INDEX["audio", "dolby_digital_plus"],
+    "DTS Lossy": COLUMN_INDEX["audio", "dts_lossy"],
+    "DTS Lossless": COLUMN_INDEX["audio", "dts_lossless"],
+    "EAC3": COLUMN_INDEX["audio", "eac3"],
+    "FLAC": COLUMN_INDEX["audio", "flac"],
+    "MP3": COLUMN_INDEX["audio", "mp3"],
+    "TrueHD": COLUMN_INDEX["audio", "truehd"],
+    "HQ Clean Audio": COLUMN_INDEX["trash", "clean_audio"],
+}
+EXTRA_COLUMNS = {
+    "_3d": COLUMN_INDEX["extras", "three_d"],
+    "converted": COLUMN_INDEX["extras", "converted"],
+    "documentary": COLUMN_INDEX["extras", "documentary"],
+    "dubbed": COLUMN_INDEX["extras", "dubbed"],
+    "edition": COLUMN_INDEX["extras", "edition"],
+    "hardcoded": COLUMN_INDEX["extras", "hardcoded"],
+    "network": COLUMN_INDEX["extras", "network"],
+    "proper": COLUMN_INDEX["extras", "proper"],
+    "repack": COLUMN_INDEX["extras", "repack"],
+    "retail": COLUMN_INDEX["extras", "retail"],
+    "subbed": COLUMN_INDEX["extras", "subbed"],
+    "upscaled": COLUMN_INDEX["extras", "upscaled"],
+    "site": COLUMN_INDEX["extras", "site"],
+    "size": COLUMN_INDEX["trash", "size"],
+    "scene": COLUMN_INDEX["extras", "scene"],
+}
+
+# Bonus given by RTN for a preferred pattern or a preferred language
+PREFERRED_BONUS = 10000
+
+
+def feature_row(data: ParsedData) -> List[int]:
+    """Count how many times each attribute column contributes to the rank of a parsed title."""
+    row = [0] * len(FEATURE_COLUMNS)
+
+    if data.quality in QUALITY_COLUMNS:
+        row[QUALITY_COLUMNS[data.quality]] += 1
+
+    if data.codec and data.codec.lower() in CODEC_COLUMNS:
+        row[CODEC_COLUMNS[data.codec.lower()]] += 1
+
+    # Bit depth only counts when there is HDR data
+    if data.hdr:
+        for hdr in data.hdr:
+            if hdr in HDR_COLUMNS:
+                row[HDR_COLUMNS[hdr]] += 1
+        if data.bit_depth:
+            row[COLUMN_INDEX["hdr", "10bit"]] += 1
+
+    for channel in data.channels:
+        if channel in CHANNEL_COLUMNS:
+            row[CHANNEL_COLUMNS[channel]] += 1
+
+    for audio_format in data.audio:
+        if audio_format in AUDIO_COLUMNS:
+            row[AUDIO_COLUMNS[audio_format]] += 1
+
+    # Extras only count for titles with bit depth, HDR, seasons or episodes
+    if data.bit_depth or data.hdr or data.seasons or data.episodes:
+        for attr, column in EXTRA_COLUMNS.items():
+            if getattr(data, attr):
+                row[column] += 1
+
+    return row
+
+
+def feature_matrix(parsed: List[ParsedData], cache: ParseCache = parse_cache) -> np.ndarray:
+    """Build the `(titles, attribute columns)` feature matrix of parsed titles.
+
+    Rows come from the parse cache the titles were parsed with, so rescoring
+    titles after a weight change only costs the matrix product.
+    """
+    import numpy as np
+    rows = [cache.features(data) for data in parsed]
+    return np.array(rows, dtype=np.int64).reshape(len(parsed), len(FEATURE_COLUMNS))
+
+
+def weight_vector(settings: SettingsModel, ranking_model: BaseRankingModel) -> np.ndarray:
+    """Rank weight of every attribute column for a configuration."""
+    import numpy as np
+    weights = np.zeros(len(FEATURE_COLUMNS), dtype=np.int64)
+    for i, (category, key, attr) in enumerate(FEATURE_COLUMNS):
+        custom_rank = settings.custom_ranks[category][key]
+        weights[i] = custom_rank.rank if custom_rank.use_custom_rank else getattr(ranking_model, attr)
+    return weights
+
+
+def preferred_bonus(parsed: List[ParsedData], settings) -> np.ndarray:
+    """Rank bonus from preferred patterns and preferred languages, which depend on the settings.
+
+    `settings` is either shared by all titles or a list with the settings of each title.
+    """
+    import numpy as np
+    bonus = np.zeros(len(parsed), dtype=np.int64)
+    if isinstance(settings, SettingsModel):
+        if not any(settings.preferred) and not settings.languages["preferred"]:
+            return bonus
+        settings = repeat(settings)
+
+    # Titles of a batch share a few settings objects, build their matchers once
+    matchers = {}
+    for i, (data, title_settings) in enumerate(zip(parsed, settings)):
+        matcher = matchers.get(id(title_settings))
+        if matcher is None:
+            matcher = matchers[id(title_settings)] = pattern_matcher(title_settings.preferred)
+        languages = title_settings.languages["preferred"]
+        if matcher.search_any(data.raw_title):
+            bonus[i] += PREFERRED_BONUS
+        if languages and any(lang in data.languages for lang in languages):
+            bonus[i] += PREFERRED_BONUS
+    return bonus
+
+
+def score_parsed(parsed: List[ParsedData], settings, ranking_model: BaseRankingModel,
+                 features: np.ndarray = None) -> np.ndarray:
+    """Rank every parsed title at once, as a feature matrix x weight vector product.
+
+    `settings` is either shared by all titles or a list with the settings of each
+    title, which may only differ in their patterns.
+    """
+    if features is None:
+        features = feature_matrix(parsed)
+    shared = settings if isinstance(settings, SettingsModel) else settings[0]
+    return features @ weight_vector(shared, ranking_model) + preferred_bonus(parsed, settings)
+
+
+def verify_scores(parsed: List[ParsedData], settings: SettingsModel, ranking_model: BaseRankingModel) -> List[dict]:
+    """Compare the vectorized scores against `RTN.ranker.get_rank` and return the mismatches."""
+    title_settings, _ = _guard_parsed(settings, parsed)
+    scores = score_parsed(parsed, title_settings, ranking_model) if parsed else []
+    mismatches = []
+    for data, score, guarded in zip(parsed, scores, title_settings):
+        expected = get_rank(data, guarded, ranking_model)
+        if int(score) != expected:
+            mismatches.append({"raw_title": data.raw_title, "expected": expected, "vectorized": int(score)})
+    return mismatches
+
+
+def iter_title_lines(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """Lazily read `raw_title<TAB>correct_title` lines, the correct title being optional."""
+    for line in lines:
+        raw_title, _, correct_title = line.strip("\r\n").partition("\t")
+        if raw_title.strip():
+            yield raw_title.strip(), correct_title.strip()
+
+
+def read_title_lines(lines: Iterable[str]) -> List[Tuple[str, str]]:
+    """Read `raw_title<TAB>correct_title` lines, the correct title being optional."""
+    return list(iter_title_lines(lines))
+
+
+class CompiledPattern(NamedTuple):
+    """A user pattern compiled the way the app evaluates it."""
+    source: str                   # as entered, e.g. `/SPARKS/`
+    pattern: str                  # without the enclosing slashes
+    case_sensitive: bool
+    regex: Optional[regex.Pattern]
+    error: Optional[str]          # set instead of `regex` for invalid patterns
+
+
+def pattern_source(pattern) -> str:
+    """User-facing source of a pattern, which may already be compiled by SettingsModel."""
+    if isinstance(pattern, str):
+        return pattern
+    return f"/{pattern.pattern}/" if not pattern.flags & regex.IGNORECASE else pattern.pattern
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_pattern(source: str) -> CompiledPattern:
+    """Compile a single pattern, `/pattern/` being case-sensitive. Invalid patterns are cached too."""
+    case_sensitive = source.startswith('/') and source.endswith('/') and len(source) > 2
+    pattern = source[1:-1] if case_sensitive else source
+    try:
+        compiled = regex.compile(pattern) if case_sensitive else regex.compile(pattern, regex.IGNORECASE)
+    except Exception as err:
+        return CompiledPattern(source, pattern, case_sensitive, None, str(err))
+    return CompiledPattern(source, pattern, case_sensitive, compiled, None)
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_pattern_list(sources: Tuple[str, ...]) -> Tuple[CompiledPattern, ...]:
+    return tuple(compile_pattern(source) for source in sources)
+
+
+def compile_patterns(patterns: Iterable) -> Tuple[CompiledPattern, ...]:
+    """Compiled patterns of a require/exclude/preferred list, compiled once per distinct list."""
+    return _compile_pattern_list(tuple(pattern_source(pattern) for pattern in patterns if pattern))
+
+
+# Constructs that change meaning once a pattern is embedded in a larger alternation:
+# backreferences, conditional group references, recursion, \G, inline global flags, the \K
+# match reset and backtracking control verbs such as (*SKIP) and (*PRUNE), which cut off
+# the other patterns of the alternation
+_UNCOMBINABLE = regex.compile(r"\\[1-9gGkK]|\(\*|\(\?P[=>]|\(\?&|\(\?\(|\(\?[0-9R+-]|\(\?[a-zA-Z^]+\)")
+
+
+class PatternMatcher:
+    """Matches a list of patterns against a title with a single scan.
+
+    All patterns are joined in one alternation (each keeping its own case
+    sensitivity) and scanned with overlapping matches, which yields every
+    position where at least one pattern matches. Each pattern is then only
+    tried at those positions, and the non-overlapping left-to-right walk of
+    `finditer` is replayed so the results are identical to running `finditer`
+    for every pattern. Titles that match nothing, the common case with long
+    blocklists, cost one scan instead of one scan per pattern.
+
+    Patterns that cannot be safely embedded in the alternation, or that
+    produce empty matches, fall back to their own `finditer`.
+
+    The same patterns are also joined in a probe for `slow_patterns`, an
+    alternation of atomic groups that always fails afterwards. A scan of the
+    probe tries every pattern once at every position, as a search that finds
+    nothing would, so it costs at most what the separate searches do.
+    """
+
+    def __init__(self, patterns: Tuple[CompiledPattern, ...]):
+        self.patterns = patterns
+        self.combined = None
+        self.probe = None
+        self.combined_indices = []
+        self.fallback_indices = []
+
+        for i, compiled in enumerate(patterns):
+            if compiled.regex is None:
+                continue
+            if _UNCOMBINABLE.search(compiled.pattern):
+                self.fallback_indices.append(i)
+            else:
+                self.combined_indices.append(i)
+
+        if self.combined_indices:
+            alternation = "|".join(
+                f"(?{'-i' if patterns[i].case_sensitive else 'i'}:{patterns[i].pattern})"
+                for i in self.combined_indices
+            )
+            probe = "(?:" + "|".join(
+                f"(?>(?{'-i' if patterns[i].case_sensitive else 'i'}:{patterns[i].pattern}))"
+                for i in self.combined_indices
+            ) + ")(?!)"
+            try:
+                self.combined = regex.compile(alternation)
+                self.probe = regex.compile(probe)
+            except Exception:
+                self.combined = None
+                self.fallback_indices = sorted(self.fallback_indices + self.combined_indices)
+                self.combined_indices = []
+
+    def slow_patterns(self, text: str, timeout: float = PATTERN_TIMEOUT) -> List[int]:
+        """Indices of the valid patterns whose search runs over `timeout` seconds on `text`.
+
+        One scan of the probe stands for all combined patterns, they are only
+        searched one by one when the probe runs over the budget.
+        """
+        suspects = list(self.fallback_indices)
+        if self.probe is not None:
+            try:
+                self.probe.search(text, timeout=timeout)
+            except TimeoutError:
+                suspects.extend(self.combined_indices)
+
+        slow = []
+        for i in sorted(suspects):
+            try:
+                self.patterns[i].regex.search(text, timeout=timeout)
+            except TimeoutError:
+                slow.append(i)
+        return slow
+
+    def search_any(self, text: str) -> bool:
+        """Whether any valid pattern matches `text`, like `any(pattern.search(text) ...)` with one scan."""
+        if self.combined is not None and self.combined.search(text):
+            return True
+        return any(self.patterns[i].regex.search(text) for i in self.fallback_indices)
+
+    def matches(self, text: str, timeout: float = None) -> List[Optional[List[Tuple[int, int, str]]]]:
+        """`(start, end, matched text)` of every match, per pattern.
+
+        The entry is None for invalid patterns, and for patterns that ran over
+        `timeout` seconds on this text.
+        """
+        results = [None if compiled.regex is None else [] for compiled in self.patterns]
+        separate = list(self.fallback_indices)
+
+        if self.combined is not None:
+            try:
+                starts = [found.start() for found in self.combined.finditer(text, overlapped=True, timeout=timeout)]
+            except TimeoutError:
+                # Some pattern backtracks too much on this text, match them one by one to find which
+                separate.extend(self.combined_indices)
+                starts = []
+
+            for i in self.combined_indices if starts else ():
+                pattern = self.patterns[i].regex
+                cursor = 0
+                for start in starts:
+                    if start < cursor:
+                        continue
+                    try:
+                        found = pattern.match(text, start, timeout=timeout)
+                    except TimeoutError:
+                        results[i] = None
+                        break
+                    if found is None:
+                        continue
+                    if found.end() == found.start():
+                        # Empty matches follow special rules in finditer, let it handle them
+                        results[i] = _finditer(pattern, text, timeout)
+                        break
+                    results[i].append((found.start(), found.end(), found.group(0)))
+                    cursor = found.end()
+
+        for i in separate:
+            results[i] = _finditer(self.patterns[i].regex, text, timeout)
+        return results
+
+
+def _finditer(pattern: regex.Pattern, text: str, timeout: float = None) -> Optional[List[Tuple[int, int, str]]]:
+    try:
+        return [(found.start(), found.end(), found.group(0)) for found in pattern.finditer(text, timeout=timeout)]
+    except TimeoutError:
+        return None
+
+
+@functools.lru_cache(maxsize=256)
+def _pattern_matcher(sources: Tuple[str, ...]) -> PatternMatcher:
+    return PatternMatcher(_compile_pattern_list(sources))
+
+
+def pattern_matcher(patterns: Iterable) -> PatternMatcher:
+    """Combined matcher of a require/exclude/preferred list, built once per distinct list."""
+    return _pattern_matcher(tuple(pattern_source(pattern) for pattern in patterns if pattern))
+
+
+class SlowPattern(NamedTuple):
+    """A pattern that ran over the time budget on a title."""
+    field: str
+    source: str
+    title: str
+
+
+def _field_matchers(settings: SettingsModel) -> List[Tuple[str, PatternMatcher]]:
+    return [(field, pattern_matcher(getattr(settings, field))) for field in PATTERN_FIELDS]
+
+
+def _find_slow(field_matchers: List[Tuple[str, PatternMatcher]], title: str, timeout: float) -> List[SlowPattern]:
+    return [
+        SlowPattern(field, matcher.patterns[i].source, title)
+        for field, matcher in field_matchers
+        for i in matcher.slow_patterns(title, timeout)
+    ]
+
+
+def find_slow_patterns(settings: SettingsModel, title: str, timeout: float = PATTERN_TIMEOUT) -> List[SlowPattern]:
+    """Require, exclude and preferred patterns that take longer than `timeout` seconds on `title`."""
+    return _find_slow(_field_matchers(settings), title, timeout)
+
+
+def without_patterns(settings: SettingsModel, slow: List[SlowPattern]) -> SettingsModel:
+    """Copy of the settings leaving out the slow patterns."""
+    update = {}
+    for field in PATTERN_FIELDS:
+        skipped = {pattern.source for pattern in slow if pattern.field == field}
+        if skipped:
+            patterns = getattr(settings, field)
+            update[field] = [pattern for pattern in patterns if pattern_source(pattern) not in skipped]
+    return settings.model_copy(update=update)
+
+
+def guard_patterns(rtn: RTN, title: str, timeout: float = PATTERN_TIMEOUT) -> Tuple[RTN, List[SlowPattern]]:
+    """RTN instance that is safe to run on `title`, and the patterns it had to leave out.
+
+    RTN evaluates the patterns without any time limit, so a pattern with
+    catastrophic backtracking would block the worker. Patterns are tried first
+    with a time budget, and the title is ranked without the ones exceeding it.
+    """
+    slow = find_slow_patterns(rtn.settings, title, timeout)
+    if not slow:
+        return rtn, slow
+    return RTN(settings=without_patterns(rtn.settings, slow), ranking_model=rtn.ranking_model), slow
+
+
+def _guard_parsed(settings: SettingsModel, parsed: List[ParsedData],
+                  timeout: float = PATTERN_TIMEOUT) -> Tuple[List[SettingsModel], List[List[SlowPattern]]]:
+    """Settings safe to run on each parsed title, and the slow patterns each one leaves out.
+
+    A pattern is left out only for the titles it runs over the budget on, so a
+    title is ranked the same whatever else is in its batch or chunk. Titles
+    leaving out the same patterns share the same settings object.
+    """
+    title_settings = []
+    title_slow = []
+    guarded_by_slow = {}
+    field_matchers = _field_matchers(settings)
+    for data in parsed:
+        slow = _find_slow(field_matchers, data.raw_title, timeout)
+        guarded = settings
+        if slow:
+            key = frozenset((pattern.field, pattern.source) for pattern in slow)
+            guarded = guarded_by_slow.get(key)
+            if guarded is None:
+                guarded = guarded_by_slow[key] = without_patterns(settings, slow)
+        title_settings.append(guarded)
+        title_slow.append(slow)
+    return title_settings, title_slow
+
+
+def _guarded_rtn(rtns: dict, settings: SettingsModel, ranking_model: BaseRankingModel) -> RTN:
+    """RTN instance of guarded settings, built once per settings object of a batch.
+
+    `rtns` maps `id(settings)` to its RTN instance, seeded with the unguarded instance.
+    """
+    rtn = rtns.get(id(settings))
+    if rtn is None:
+        rtn = rtns[id(settings)] = RTN(settings=settings, ranking_model=ranking_model)
+    return rtn
+
+
+def _slow_summary(slow: List[SlowPattern]) -> str:
+    return ", ".join(f"{pattern.field}: {pattern.source}" for pattern in slow)
+
+
+def profile_patterns(patterns_by_field: dict, titles: List[str], timeout: float = PATTERN_TIMEOUT) -> List[dict]:
+    """Time every require/exclude/preferred pattern on every title, most expensive first.
+
+    Each pattern is searched on its own, the way RTN evaluates it, with the same
+    time budget as ranking. Titles that ran over it count as timeouts, with the
+    time spent until the budget ran out. Invalid patterns are left out.
+    """
+    import numpy as np
+    rows = []
+    for field in PATTERN_FIELDS:
+        for compiled in compile_patterns(patterns_by_field.get(field, [])):
+            if compiled.error:
+                continue
+
+            search = compiled.regex.search
+            timings = np.zeros(len(titles))
+            matched = timeouts = 0
+            for n, title in enumerate(titles):
+                started = time.perf_counter()
+                try:
+                    if search(title, timeout=timeout):
+                        matched += 1
+                except TimeoutError:
+                    timeouts += 1
+                timings[n] = time.perf_counter() - started
+
+            rows.append({
+                "field": field,
+                "pattern": compiled.source,
+                "total_ms": timings.sum() * 1e3,
+                "mean_us": timings.mean() * 1e6 if titles else 0.0,
+                "p99_us": np.percentile(timings, 99) * 1e6 if titles else 0.0,
+                "matched_titles": matched,
+                "timeouts": timeouts
+            })
+    rows.sort(key=lambda row: row["total_ms"], reverse=True)
+    return rows
+
+
+def load_reference_titles() -> List[Tuple[str, str]]:
+    """Load the reference corpus shipped with the app."""
+    with open(REFERENCE_TITLES_PATH, encoding='utf-8') as f:
+        return read_title_lines(f)
+
+
+def iter_title_csv(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """Lazily read CSV lines with a `raw_title` and optional `correct_title` column."""
+    reader = csv.DictReader(lines)
+    if not reader.fieldnames or 'raw_title' not in reader.fieldnames:
+        raise ValueError("CSV must have a 'raw_title' column")
+    for row in reader:
+        raw_title = (row.get('raw_title') or '').strip()
+        if raw_title:
+            yield raw_title, (row.get('correct_title') or '').strip()
+
+
+def read_title_csv(text: str) -> List[Tuple[str, str]]:
+    """Read titles from CSV text with a `raw_title` and optional `correct_title` column."""
+    return list(iter_title_csv(io.StringIO(text)))
+
+
+def iter_title_file(f, name: str) -> Iterator[Tuple[str, str]]:
+    """Lazily read an open `.csv` file, or a `.txt` file of `raw_title<TAB>correct_title` lines."""
+    if name.lower().endswith('.csv'):
+        return iter_title_csv(f)
+    return iter_title_lines(f)
+
+
+def _fetch_status(rtn: RTN, data: ParsedData, correct_title: str, speed_mode: bool) -> Tuple[float, bool, List[str]]:
+    """Title similarity, fetch decision and the reasons RTN.rank would drop the title for, whatever its rank."""
+    lev_ratio = 0.0
+    if correct_title:
+        lev_ratio = get_lev_ratio(correct_title, data.parsed_title, rtn.lev_threshold, {})
+    is_fetchable, failed_keys = check_fetch(data, rtn.settings, speed_mode)
+
+    # Mirror the GarbageTorrent conditions of RTN.rank
+    reasons = []
+    if not is_fetchable:
+        reasons.append(f"denied by: {', '.join(sorted(failed_keys))}")
+    if correct_title and lev_ratio < rtn.lev_threshold:
+        reasons.append(f"title mismatch ({lev_ratio:.2f} < {rtn.lev_threshold})")
+    return lev_ratio, is_fetchable, reasons
+
+
+def _result_row(rtn: RTN, data: ParsedData, correct_title: str, rank: int, *,
+                remove_trash: bool, speed_mode: bool, slow: List[SlowPattern] = ()) -> dict:
+    """Fetch checks for an already ranked title; reports why RTN would drop it instead of raising."""
+    lev_ratio, is_fetchable, reasons = _fetch_status(rtn, data, correct_title, speed_mode)
+    kept = not remove_trash or not reasons
+    remove_ranks_under = rtn.settings.options["remove_ranks_under"]
+    if rank < remove_ranks_under:
+        reasons.append(f"rank under {remove_ranks_under}")
+        kept = False
+
+    return {
+        "raw_title": data.raw_title,
+        "correct_title": correct_title,
+        "parsed_title": data.parsed_title,
+        "rank": rank,
+        "fetch": is_fetchable,
+        "kept": kept,
+        "lev_ratio": lev_ratio,
+        "resolution": data.resolution,
+        "failing_reason": "; ".join(reasons),
+        "slow_patterns": _slow_summary(slow)
+    }
+
+
+def _error_row(raw_title: str, correct_title: str, err: Exception, columns: List[str] = RESULT_COLUMNS) -> dict:
+    row = dict.fromkeys(columns)
+    row.update(raw_title=raw_title, correct_title=correct_title, failing_reason=f"error: {err}")
+    return row
+
+
+def _parse_titles(titles: Iterable[Tuple[str, str]], columns: List[str] = RESULT_COLUMNS,
+                  cache: ParseCache = parse_cache):
+    """Parse titles through the parse cache; titles that fail to parse get an error row."""
+    rows = []
+    parsed = []
+    for raw_title, correct_title in titles:
+        try:
+            parsed.append((len(rows), cache.parse(raw_title), correct_title))
+            rows.append(None)
+        except Exception as err:
+            rows.append(_error_row(raw_title, correct_title, err, columns))
+    return rows, parsed
+
+
+def rank_titles(rtn: RTN, titles: Iterable[Tuple[str, str]], *, remove_trash: bool = True,
+                speed_mode: bool = True, cache: ParseCache = parse_cache) -> List[dict]:
+    """Rank `(raw_title, correct_title)` pairs with a single RTN instance.
+
+    Titles are parsed first, through `cache`, then all ranks are computed with
+    one matrix product. Patterns running over the time budget on a title are
+    left out for that title.
+    """
+    rows, parsed = _parse_titles(titles, cache=cache)
+    return _rank_parsed(rtn, rows, parsed, remove_trash=remove_trash, speed_mode=speed_mode, cache=cache)
+
+
+def _rank_parsed(rtn: RTN, rows: List[Optional[dict]], parsed: List[Tuple[int, ParsedData, str]], *,
+                 remove_trash: bool, speed_mode: bool, cache: ParseCache = parse_cache) -> List[dict]:
+    """Fill the `None` rows of `_parse_titles` with the ranked rows of its parsed titles."""
+    if not parsed:
+        return rows
+
+    parsed_data = [data for _, data, _ in parsed]
+    title_settings, title_slow = _guard_parsed(rtn.settings, parsed_data)
+    scores = score_parsed(parsed_data, title_settings, rtn.ranking_model, feature_matrix(parsed_data, cache))
+    rtns = {id(rtn.settings): rtn}
+    for (i, data, correct_title), score, settings, slow in zip(parsed, scores, title_settings, title_slow):
+        try:
+            guarded = _guarded_rtn(rtns, settings, rtn.ranking_model)
+            rows[i] = _result_row(guarded, data, correct_title, int(score),
+                                  remove_trash=remove_trash, speed_mode=speed_mode, slow=slow)
+        except Exception as err:
+            rows[i] = _error_row(data.raw_title, correct_title, err)
+    return rows
+
+
+def iter_ranked_chunks(rtn: RTN, titles: Iterable[Tuple[str, str]], *, chunk_size: int = 1000,
+                       remove_trash: bool = True, speed_mode: bool = True) -> Iterator[List[dict]]:
+    """Rank titles `chunk_size` at a time, so memory does not grow with the number of titles.
+
+    `titles` is consumed lazily, one chunk ahead of the rows handed out.
+    """
+    titles = iter(titles)
+    while chunk := list(islice(titles, max(int(chunk_size), 1))):
+        yield rank_titles(rtn, chunk, remove_trash=remove_trash, speed_mode=speed_mode)
+
+
+def iter_ranked_rows(rtn: RTN, titles: Iterable[Tuple[str, str]], *, chunk_size: int = 1000,
+                     remove_trash: bool = True, speed_mode: bool = True) -> Iterator[dict]:
+    """Rows of `iter_ranked_chunks`, one at a time."""
+    for rows in iter_ranked_chunks(rtn, titles, chunk_size=chunk_size,
+                                   remove_trash=remove_trash, speed_mode=speed_mode):
+        yield from rows
+
+
+def release_key(raw_title: str) -> str:
+    """Raw title without its cosmetic differences: case and runs of dots, underscores, dashes and spaces."""
+    return regex.sub(r"[\s._-]+", " ", raw_title).strip().casefold()
+
+
+def dedupe_titles(titles: Iterable[Tuple[str, str]], *, normalize: bool = False
+                  ) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]], List[int]]:
+    """Distinct releases of `titles`, the first spelling of each standing for all of them.
+
+    Returns all titles, the distinct ones, and for every title the index of its
+    distinct title. The correct title is part of the key, as the title similarity
+    depends on it. With `normalize`, titles differing only by `release_key` count
+    as the same release. RTN's parser does read separators and case (`AAC.5.1`
+    and `AAC 5 1` can rank differently), so this trades exactness for less work.
+    """
+    titles = list(titles)
+    distinct = []
+    positions = []
+    index = {}
+    for raw_title, correct_title in titles:
+        key = (release_key(raw_title) if normalize else raw_title, correct_title)
+        position = index.get(key)
+        if position is None:
+            position = index[key] = len(distinct)
+            distinct.append((raw_title, correct_title))
+        positions.append(position)
+    return titles, distinct, positions
+
+
+def fan_out(rows: List[dict], titles: List[Tuple[str, str]], positions: List[int]) -> List[dict]:
+    """One row per title from the rows of the distinct titles, each with its own raw title."""
+    fanned = []
+    for (raw_title, _), position in zip(titles, positions):
+        row = rows[position]
+        fanned.append(row if row["raw_title"] == raw_title else {**row, "raw_title": raw_title})
+    return fanned
+
+
+def dedupe_stats(titles: int, distinct: int) -> dict:
+    return {"titles": titles, "distinct": distinct, "dedupe_ratio": 1 - distinct / titles if titles else 0.0}
+
+
+def rank_titles_deduped(rtn: RTN, titles: Iterable[Tuple[str, str]], *, normalize: bool = False,
+                        remove_trash: bool = True, speed_mode: bool = True) -> Tuple[List[dict], dict]:
+    """`rank_titles` ranking every distinct release once, see `dedupe_titles`.
+
+    Returns a row per title, in input order, and the dedupe statistics. Without
+    `normalize` the rows are the same as those of `rank_titles`.
+    """
+    titles, distinct, positions = dedupe_titles(titles, normalize=normalize)
+    rows = rank_titles(rtn, distinct, remove_trash=remove_trash, speed_mode=speed_mode)
+    return fan_out(rows, titles, positions), dedupe_stats(len(titles), len(distinct))
+
+
+# Settings compiled once per worker process by `_init_worker`
+_worker_compiled = None
+
+
+def _init_worker(settings_model: dict, profile: str):
+    global _worker_compiled
+    _worker_compiled = CompiledSettings(settings_model, profile)
+
+
+def _rank_chunk(chunk: List[Tuple[str, str]], remove_trash: bool):
+    started = time.perf_counter()
+    rows = rank_titles(_worker_compiled.rtn, chunk,
+                       remove_trash=remove_trash, speed_mode=_worker_compiled.speed_mode)
+    return os.getpid(), time.perf_counter() - started, rows
+
+
+def rank_titles_parallel(settings_model: dict, titles: Iterable[Tuple[str, str]], *, profile: str = None,
+                         remove_trash: bool = True, workers: int = None, chunk_size: int = 1000,
+                         dedupe: bool = False, normalize: bool = False):
+    """Rank titles on a process pool, returning the rows and throughput statistics.
+
+    Every worker compiles the settings once when it starts, then ranks chunks of
+    `chunk_size` titles. Rows come back in input order. The statistics report
+    titles/s over the whole run and, for each worker, how many titles it ranked
+    and the share of the wall time it spent busy. With `dedupe`, only distinct
+    releases are sent to the workers, see `rank_titles_deduped`.
+    """
+    if dedupe:
+        titles, distinct, positions = dedupe_titles(titles, normalize=normalize)
+    else:
+        titles = distinct = list(titles)
+        positions = None
+    chunk_size = max(int(chunk_size), 1)
+    chunks = [distinct[i:i + chunk_size] for i in range(0, len(distinct), chunk_size)]
+
+    rows = []
+    busy = defaultdict(float)
+    ranked = defaultdict(int)
+    started = time.perf_counter()
+    # Spawn rather than fork, forking a multi-threaded server is unsafe
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker,
+                             initargs=(settings_model, profile)) as pool:
+        for pid, elapsed, chunk_rows in pool.map(_rank_chunk, chunks, repeat(remove_trash)):
+            rows.extend(chunk_rows)
+            busy[pid] += elapsed
+            ranked[pid] += len(chunk_rows)
+    elapsed = time.perf_counter() - started
+    if positions is not None:
+        rows = fan_out(rows, titles, positions)
+
+    stats = {
+        **dedupe_stats(len(titles), len(distinct)),
+        "chunks": len(chunks),
+        "elapsed": elapsed,
+        "titles_per_second": len(titles) / elapsed if elapsed else 0.0,
+        "workers": [
+            {
+                "worker": pid,
+                "titles": ranked[pid],
+                "busy": busy[pid],
+                "utilisation": busy[pid] / elapsed if elapsed else 0.0
+            }
+            for pid in sorted(busy)
+        ]
+    }
+    return rows, stats
+
+
+def rank_positions(scores: np.ndarray) -> np.ndarray:
+    """1-based position of each score when sorted from best to worst, ties sharing a position."""
+    import numpy as np
+    ordered = np.sort(scores)
+    return len(scores) - np.searchsorted(ordered, scores, side='right') + 1
+
+
+def profile_columns(profiles: List[str]) -> List[str]:
+    """Columns of a profile comparison row, in display order."""
+    return (
+        ["raw_title", "parsed_title"]
+        + [f"rank_{profile}" for profile in profiles]
+        + [f"position_{profile}" for profile in profiles]
+        + [f"kept_{profile}" for profile in profiles]
+        + ["position_shift", "kept_diverges", "fetch", "failing_reason", "slow_patterns"]
+    )
+
+
+def compare_profiles(compiled_profiles: dict, titles: Iterable[Tuple[str, str]], *,
+                     remove_trash: bool = True) -> List[dict]:
+    """Rank titles against several profiles of the same settings in a single pass.
+
+    `compiled_profiles` maps a profile name to its `CompiledSettings`. Titles are
+    parsed and turned into features once, all profiles are scored with one
+    matrix product, and the fetch checks (which do not depend on the profile)
+    run once per title.
+    """
+    import numpy as np
+    profiles = list(compiled_profiles)
+    columns = profile_columns(profiles)
+    rows, parsed = _parse_titles(titles, columns)
+    if not parsed:
+        return rows
+
+    compiled_list = [compiled_profiles[profile] for profile in profiles]
+    reference = compiled_list[0]
+    parsed_data = [data for _, data, _ in parsed]
+
+    title_settings, title_slow = _guard_parsed(reference.settings, parsed_data)
+
+    features = feature_matrix(parsed_data)
+    weights = np.column_stack([weight_vector(c.settings, c.ranking_model) for c in compiled_list])
+    scores = features @ weights + preferred_bonus(parsed_data, title_settings)[:, None]
+    positions = np.column_stack([rank_positions(scores[:, j]) for j in range(len(profiles))])
+    remove_ranks_under = reference.settings.options["remove_ranks_under"]
+
+    rtns = {id(reference.settings): reference.rtn}
+    for n, (i, data, correct_title) in enumerate(parsed):
+        slow = title_slow[n]
+        try:
+            rtn = _guarded_rtn(rtns, title_settings[n], reference.ranking_model)
+            _, is_fetchable, reasons = _fetch_status(rtn, data, correct_title, reference.speed_mode)
+        except Exception as err:
+            rows[i] = _error_row(data.raw_title, correct_title, err, columns)
+            continue
+
+        row = {"raw_title": data.raw_title, "parsed_title": data.parsed_title}
+        kept_values = []
+        for j, profile in enumerate(profiles):
+            rank = int(scores[n, j])
+            kept = (not remove_trash or not reasons) and rank >= remove_ranks_under
+            kept_values.append(kept)
+            row[f"rank_{profile}"] = rank
+            row[f"position_{profile}"] = int(positions[n, j])
+            row[f"kept_{profile}"] = kept
+        row.update(
+            position_shift=int(positions[n].max() - positions[n].min()),
+            kept_diverges=len(set(kept_values)) > 1,
+            fetch=is_fetchable,
+            failing_reason="; ".join(reasons),
+            slow_patterns=_slow_summary(slow)
+        )
+        rows[i] = row
+    return rows
+
+
+class SettingsDiff(NamedTuple):
+    """Titles that change fate between two settings, see `diff_settings`."""
+    rows: List[dict]
+    reasons: List[dict]
+    titles: int
+    errors: int
+    min_shift: int
+    slow: int = 0
+
+
+def _reason_keys(reasons: List[str]) -> List[str]:
+    """Failure reasons without their numbers, each denied key counted on its own."""
+    keys = []
+    for reason in reasons:
+        if reason.startswith("denied by: "):
+            keys.extend(reason[len("denied by: "):].split(", "))
+        elif reason.startswith("title mismatch"):
+            keys.append("title mismatch")
+        else:
+            keys.append(reason)
+    return keys
+
+
+def _score_side(compiled: CompiledSettings, parsed_data: List[ParsedData], features: np.ndarray):
+    title_settings, title_slow = _guard_parsed(compiled.settings, parsed_data)
+    scores = score_parsed(parsed_data, title_settings, compiled.ranking_model, features)
+    return scores, rank_positions(scores), title_settings, title_slow
+
+
+def _side_status(compiled: CompiledSettings, rtns: dict, data: ParsedData, correct_title: str, rank: int,
+                 settings: SettingsModel, remove_trash: bool) -> Tuple[bool, bool, List[str]]:
+    """Fetch decision, kept flag and failure reasons of a title on one side of a diff."""
+    rtn = _guarded_rtn(rtns, settings, compiled.ranking_model)
+    _, is_fetchable, reasons = _fetch_status(rtn, data, correct_title, compiled.speed_mode)
+    kept = not remove_trash or not reasons
+    remove_ranks_under = compiled.settings.options["remove_ranks_under"]
+    if rank < remove_ranks_under:
+        reasons.append(f"rank under {remove_ranks_under}")
+        kept = False
+    return is_fetchable, kept, reasons
+
+
+def diff_settings(compiled_a: CompiledSettings, compiled_b: CompiledSettings, titles: Iterable[Tuple[str, str]], *,
+                  remove_trash: bool = True, min_shift: int = None) -> SettingsDiff:
+    """Titles whose fate differs between the settings of `compiled_a` and `compiled_b`.
+
+    A title is listed when its fetch decision or kept flag flips, or when its
+    position in the corpus, sorted by rank, moves by `min_shift` or more (by
+    default 5% of the titles). Titles are parsed and turned into features once
+    for both sides. Reason counts cover every title, not only the listed ones,
+    and so does the count of titles ranked without patterns that ran over the
+    time budget on either side.
+    """
+    rows, parsed = _parse_titles(titles, DIFF_COLUMNS)
+    errors = len(rows) - len(parsed)
+    if min_shift is None:
+        min_shift = max(1, round(len(parsed) * 0.05))
+    if not parsed:
+        return SettingsDiff([], [], len(rows), errors, min_shift)
+
+    parsed_data = [data for _, data, _ in parsed]
+    features = feature_matrix(parsed_data)
+    scores_a, positions_a, settings_a, slow_a = _score_side(compiled_a, parsed_data, features)
+    scores_b, positions_b, settings_b, slow_b = _score_side(compiled_b, parsed_data, features)
+
+    changed = []
+    reason_counts = {"a": Counter(), "b": Counter()}
+    rtns_a = {id(compiled_a.settings): compiled_a.rtn}
+    rtns_b = {id(compiled_b.settings): compiled_b.rtn}
+    slow = 0
+    for n, (_, data, correct_title) in enumerate(parsed):
+        rank_a, rank_b = int(scores_a[n]), int(scores_b[n])
+        slow += bool(slow_a[n] or slow_b[n])
+        try:
+            fetch_a, kept_a, reasons_a = _side_status(compiled_a, rtns_a, data, correct_title, rank_a,
+                                                      settings_a[n], remove_trash)
+            fetch_b, kept_b, reasons_b = _side_status(compiled_b, rtns_b, data, correct_title, rank_b,
+                                                      settings_b[n], remove_trash)
+        except Exception:
+            errors += 1
+            continue
+        reason_counts["a"].update(_reason_keys(reasons_a))
+        reason_counts["b"].update(_reason_keys(reasons_b))
+
+        shift = int(positions_b[n]) - int(positions_a[n])
+        if fetch_a != fetch_b:
+            change = "fetch flips"
+        elif kept_a != kept_b:
+            change = "kept flips"
+        elif abs(shift) >= min_shift:
+            change = "moves up" if shift < 0 else "moves down"
+        else:
+            continue
+        changed.append({
+            "raw_title": data.raw_title,
+            "correct_title": correct_title,
+            "parsed_title": data.parsed_title,
+            "change": change,
+            "rank_a": rank_a,
+            "rank_b": rank_b,
+            "position_a": int(positions_a[n]),
+            "position_b": int(positions_b[n]),
+            "position_shift": shift,
+            "fetch_a": fetch_a,
+            "fetch_b": fetch_b,
+            "kept_a": kept_a,
+            "kept_b": kept_b,
+            "failing_reason_a": "; ".join(reasons_a),
+            "failing_reason_b": "; ".join(reasons_b),
+            "slow_patterns_a": _slow_summary(slow_a[n]),
+            "slow_patterns_b": _slow_summary(slow_b[n])
+        })
+
+    # Flips first, then the largest moves
+    changed.sort(key=lambda row: (row["change"] not in ("fetch flips", "kept flips"), -abs(row["position_shift"])))
+    reasons = [
+        {"reason": reason, "titles_a": reason_counts["a"][reason], "titles_b": reason_counts["b"][reason],
+         "delta": reason_counts["b"][reason] - reason_counts["a"][reason]}
+        for reason in sorted(reason_counts["a"].keys() | reason_counts["b"].keys())
+    ]
+    reasons.sort(key=lambda row: -abs(row["delta"]))
+    return SettingsDiff(changed, reasons, len(rows), errors, min_shift, slow)
+
+
+def media_key(data: ParsedData) -> Tuple[str, Optional[int], Tuple[int, ...], Tuple[int, ...]]:
+    """Media item a title is a candidate for: its normalized title, year, seasons and episodes."""
+    title = regex.sub(r"[\W_]+", " ", data.parsed_title or "").strip().casefold()
+    return title, data.year or None, tuple(data.seasons), tuple(data.episodes)
+
+
+def media_label(key: Tuple[str, Optional[int], Tuple[int, ...], Tuple[int, ...]]) -> str:
+    title, year, seasons, episodes = key
+    label = title.title() or "?"
+    if year:
+        label += f" ({year})"
+    if seasons:
+        label += " " + "".join(f"S{season:02d}" for season in seasons)
+    if episodes:
+        label += ("" if seasons else " ") + "".join(f"E{episode:02d}" for episode in episodes)
+    return label
+
+
+def top_per_media(rtn: RTN, titles: Iterable[Tuple[str, str]], *, k: int = 3, chunk_size: int = 5000,
+                  remove_trash: bool = True, speed_mode: bool = True, kept_only: bool = True) -> dict:
+    """Best `k` titles of every media item, the way riven picks a torrent per movie or episode.
+
+    Titles are ranked `chunk_size` at a time and grouped by `media_key`. Every
+    group keeps a min-heap of its `k` best rows, so memory grows with the number
+    of media items rather than titles, and no candidate list is ever sorted as a
+    whole. Ties keep the title that came first. Titles RTN would drop are left
+    out unless `kept_only` is false. Slow patterns are left out per title, so
+    `chunk_size` does not change which titles win.
+
+    Returns the rows in `MEDIA_COLUMNS` order, by media item then place, and
+    counts of titles, candidates, groups and titles ranked without slow patterns.
+    """
+    k = max(int(k), 1)
+    heaps = {}
+    candidates = Counter()
+    seen = ranked = slow = 0
+    titles = iter(titles)
+    while chunk := list(islice(titles, max(int(chunk_size), 1))):
+        rows, parsed = _parse_titles(chunk)
+        keys = {i: media_key(data) for i, data, _ in parsed}
+        rows = _rank_parsed(rtn, rows, parsed, remove_trash=remove_trash, speed_mode=speed_mode)
+        for i, row in enumerate(rows):
+            seq = seen + i
+            slow += bool(row["slow_patterns"])
+            if i not in keys or row["rank"] is None or (kept_only and not row["kept"]):
+                continue
+            ranked += 1
+            key = keys[i]
+            candidates[key] += 1
+            # Earlier titles win ties: of two equal ranks, the one with the larger -seq stays on the heap
+            entry = (row["rank"], -seq, row)
+            heap = heaps.setdefault(key, [])
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+        seen += len(chunk)
+
+    result = []
+    for key in sorted(heaps, key=lambda key: (media_label(key), key)):
+        label = media_label(key)
+        best = sorted(heaps[key], key=lambda entry: entry[:2], reverse=True)
+        for place, (_, _, row) in enumerate(best, start=1):
+            result.append({
+                "media": label,
+                "place": place,
+                "raw_title": row["raw_title"],
+                "rank": row["rank"],
+                "resolution": row["resolution"],
+                "candidates": candidates[key],
+                "correct_title": row["correct_title"],
+                "parsed_title": row["parsed_title"],
+                "slow_patterns": row["slow_patterns"]
+            })
+    return {"rows": result, "titles": seen, "candidates": ranked, "groups": len(heaps), "slow": slow}
+
@@ -0,0 +1,57 @@
+"""Cold start timings of the app process.
+
+Streamlit runs the app script again on every rerun, while modules are imported
+once per process, so what is recorded here describes the first run of the
+script in this process: how long each heavy import took, when the page chrome
+was first drawn and when the first run finished. Times are relative to the
+first import of this module, at the top of the app script.
+"""
+import importlib
+import sys
+import time
+
+STARTED = time.perf_counter()
+
+import_seconds = {}
+first_paint_seconds = None
+ready_seconds = None
+
+
+def timed_import(name: str):
+    """Import `name`, recording how long it took if it was not imported yet."""
+    if name not in sys.modules:
+        started = time.perf_counter()
+        importlib.import_module(name)
+        import_seconds[name] = time.perf_counter() - started
+    return sys.modules[name]
+
+
+def mark_first_paint():
+    """Record the first time the page chrome was drawn."""
+    global first_paint_seconds
+    if first_paint_seconds is None:
+        first_paint_seconds = time.perf_counter() - STARTED
+
+
+def mark_ready() -> bool:
+    """Record the end of the first script run, True the first time only."""
+    global ready_seconds
+    if ready_seconds is not None:
+        return False
+    ready_seconds = time.perf_counter() - STARTED
+    return True
+
+
+def report() -> dict:
+    return {
+        "first_paint_s": first_paint_seconds,
+        "ready_s": ready_seconds,
+        "imports": [{"module": name, "seconds": seconds} for name, seconds in import_seconds.items()]
+    }
+
+
+def summary() -> str:
+    """One line cold start summary, for the server log."""
+    imports = ", ".join(f"{name} {seconds * 1e3:,.0f} ms" for name, seconds in import_seconds.items())
+    return (f"Cold start: first paint {(first_paint_seconds or 0) * 1e3:,.0f} ms, "
+            f"ready {(ready_seconds or 0) * 1e3:,.0f} ms, imports: {imports or 'none'}")
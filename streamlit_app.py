@@ -1,19 +1,19 @@
 import streamlit as st
-from RTN import RTN
-from RTN.fetch import check_required, check_exclude
-from RTN.parser import parse
-from RTN.ranker import calculate_preferred
-from RTN.models import (
-    BaseRankingModel, DefaultRanking, SettingsModel, CustomRank,
-    ResolutionConfig, OptionsConfig, LanguagesConfig, CustomRanksConfig,
-    QualityRankModel, RipsRankModel, HdrRankModel, AudioRankModel, ExtrasRankModel, TrashRankModel
-)
 import json
-from pydantic import BaseModel
 from typing import List, Dict
 from importlib.metadata import version
-import lzstring
-import regex
+import time
+import os
+import sys
+import math
+import io
+import glob
+import gzip
+import tempfile
+import startup
+
+# Start of this rerun, for the timing panel
+rerun_started = time.perf_counter()
 
 # Get RTN version
 try:
@@ -21,6 +21,14 @@ try:
 except:
     rtn_version = "Unknown"
 
+# Rows of a streamed corpus kept on the page, the others only go to the download
+STREAM_PREVIEW_ROWS = 100
+# Age in seconds past which a streamed results file counts as abandoned by its session
+STREAM_RESULTS_MAX_AGE = 24 * 3600
+
+# Test cases shown at a time on the Test Titles page
+TITLES_PAGE_SIZES = [10, 25, 50, 100]
+
 # Set the page configuration with a modern layout
 st.set_page_config(
     page_title="Rank Torrent Name (RTN)",
@@ -72,28 +80,6 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Initialize LZString compressor
-lz = lzstring.LZString()
-
-def compress_string(string: str) -> str:
-    """Compress a string using LZString and make it URL safe."""
-    try:
-        # Use compressToEncodedURIComponent instead of compressToBase64
-        compressed = lz.compressToEncodedURIComponent(string)
-        if compressed:
-            return compressed
-        return string
-    except Exception:
-        return string
-
-def decompress_string(string: str, default_value: str = '') -> str:
-    """Decompress a URL-safe LZString compressed string."""
-    try:
-        decompressed = lz.decompressFromEncodedURIComponent(string)
-        return decompressed if decompressed else default_value
-    except Exception:
-        return default_value
-
 # -----------------------------------------------------------------------------
 # Sidebar navigation and info
 with st.sidebar:
@@ -105,9 +91,22 @@ with st.sidebar:
     
     page = st.radio(
         "Go to",
-        ["Settings", "Test Titles", "Preset Profiles", "Import/Export"],
+        ["Settings", "Test Titles", "Rank Corpus", "Preset Profiles", "Import/Export"],
         index=0
     )
+
+    timing_enabled = st.toggle(
+        "⏱️ Rerun timing",
+        value=st.query_params.get("timing") == "1",
+        help="Show where the time of each rerun goes. Can also be enabled with `?timing=1` in the URL."
+    )
+
+    short_links = st.toggle(
+        "🔗 Short share links",
+        value="c" in st.query_params,
+        help="Keep the configuration on the server and put only its short key in the URL. "
+             "Needed for large title lists, which do not fit in the URL."
+    )
     
     st.markdown("---")
     st.markdown("""
@@ -142,221 +141,77 @@ Test settings for `riven`.
 ''
 ''
 
-# From https://github.com/rivenmedia/riven/blob/0dbc9f70161dc6cd5f219e81a4424b15aa6fbf14/backend/program/settings/versions.py
-
-# Default ranking models from RTN
-class DefaultRanking(BaseRankingModel):
-    """Default ranking model preset that covers the most common use cases."""
-    # quality
-    av1: int = 0
-    avc: int = 500
-    bluray: int = 100
-    dvd: int = -1000
-    hdtv: int = -1000
-    hevc: int = 500
-    mpeg: int = -100
-    remux: int = -10000
-    vhs: int = -10000
-    web: int = 150
-    webdl: int = 5000
-    webmux: int = -10000
-    xvid: int = -10000
-    pdtv: int = -10000
-
-    # rips
-    bdrip: int = -1000
-    brrip: int = -1000
-    dvdrip: int = -1000
-    hdrip: int = -1000
-    ppvrip: int = -1000
-    tvrip: int = -10000
-    uhdrip: int = -1000
-    vhsrip: int = -10000
-    webdlrip: int = -10000
-    webrip: int = 30
-
-    # hdr
-    bit_10: int = 5
-    dolby_vision: int = 50
-    hdr: int = 50
-    hdr10plus: int = 0
-    sdr: int = 0
-
-    # audio
-    aac: int = 250
-    ac3: int = 30
-    atmos: int = 400
-    dolby_digital: int = 0
-    dolby_digital_plus: int = 0
-    dts_lossy: int = 600
-    dts_lossless: int = 0
-    eac3: int = 250
-    flac: int = 0
-    mono: int = -10000
-    mp3: int = -10000
-    stereo: int = 0
-    surround: int = 0
-    truehd: int = -100
-
-    # extras
-    three_d: int = -10000
-    converted: int = -1250
-    documentary: int = -250
-    dubbed: int = 0
-    edition: int = 100
-    hardcoded: int = 0
-    network: int = 300
-    proper: int = 1000
-    repack: int = 1000
-    retail: int = 0
-    site: int = -10000
-    subbed: int = 0
-    upscaled: int = -10000
-    scene: int = 2000
-
-    # trash
-    cam: int = -10000
-    clean_audio: int = -10000
-    r5: int = -10000
-    satrip: int = -10000
-    screener: int = -10000
-    size: int = -10000
-    telecine: int = -10000
-    telesync: int = -10000
-    adult: int = -10000
-
-
-class BestRanking(BaseRankingModel):
-    """Ranking model preset that prioritizes the highest quality and most desirable attributes."""
-    # quality
-    av1: int = 500
-    avc: int = 500
-    bluray: int = 100
-    dvd: int = -5000
-    hdtv: int = -5000
-    hevc: int = 500
-    mpeg: int = -1000
-    remux: int = 10000
-    vhs: int = -10000
-    web: int = 100
-    webdl: int = 200
-    webmux: int = -10000
-    xvid: int = -10000
-    pdtv: int = -10000
-
-    # rips
-    bdrip: int = -5000
-    brrip: int = -10000
-    dvdrip: int = -5000
-    hdrip: int = -10000
-    ppvrip: int = -10000
-    tvrip: int = -10000
-    uhdrip: int = -5000
-    vhsrip: int = -10000
-    webdlrip: int = -10000
-    webrip: int = -1000
-
-    # hdr
-    bit_10: int = 100
-    dolby_vision: int = 3000
-    hdr: int = 2000
-    hdr10plus: int = 2100
-    sdr: int = 0
-
-    # audio
-    aac: int = 100
-    ac3: int = 50
-    atmos: int = 1000
-    dolby_digital: int = 0
-    dolby_digital_plus: int = 0
-    dts_lossy: int = 100
-    dts_lossless: int = 2000
-    eac3: int = 150
-    flac: int = 0
-    mono: int = -1000
-    mp3: int = -1000
-    stereo: int = 0
-    surround: int = 0
-    truehd: int = 2000
-
-    # extras
-    three_d: int = -10000
-    converted: int = -1000
-    documentary: int = -250
-    dubbed: int = -1000
-    edition: int = 100
-    hardcoded: int = 0
-    network: int = 0
-    proper: int = 20
-    repack: int = 20
-    retail: int = 0
-    site: int = -10000
-    subbed: int = 0
-    upscaled: int = -10000
-    scene: int = 0
-
-    # trash
-    cam: int = -10000
-    clean_audio: int = -10000
-    r5: int = -10000
-    satrip: int = -10000
-    screener: int = -10000
-    size: int = -10000
-    telecine: int = -10000
-    telesync: int = -10000
-    adult: int = -10000
-
-
-# Available ranking models
-rtn_rank_models = {
-    "default": DefaultRanking(),
-    "best": BestRanking(),
-    "custom": BaseRankingModel(),
-}
+startup.mark_first_paint()
+
+# -----------------------------------------------------------------------------
+# Heavy imports come after the page chrome, so that a cold start draws it first.
+# Importing any part of RTN imports all of it.
+startup.timed_import("RTN")
+startup.timed_import("rtn_engine")
+from RTN.fetch import check_required, check_exclude
+from RTN.ranker import calculate_preferred
+from RTN.models import (
+    BaseRankingModel, SettingsModel, CustomRank,
+    QualityRankModel, RipsRankModel, HdrRankModel, AudioRankModel, ExtrasRankModel, TrashRankModel
+)
+from pydantic import BaseModel
+from rtn_engine import (
+    NULL_TIMER, PATTERN_TIMEOUT, PLACEHOLDER_INFOHASH, RANK_PROFILES,
+    DIFF_COLUMNS, MEDIA_COLUMNS, RESULT_COLUMNS,
+    BestRanking, CompiledSettings, ConfStore, DefaultRanking, StageTimer,
+    decode_conf_json, decompress_string, encode_conf, generate_initial_conf, load_settings, settings_hash,
+    iter_title_file, iter_title_lines, load_reference_titles, read_title_csv, read_title_lines,
+    compile_pattern, guard_patterns, pattern_matcher, profile_patterns,
+    parse_cache, rank_torrent, rank_titles, rank_titles_deduped, rank_titles_parallel, iter_ranked_chunks,
+    compare_profiles, profile_columns, diff_settings, top_per_media, verify_scores
+)
 
+# Records nothing unless the timing panel is enabled
+timer = StageTimer() if timing_enabled else NULL_TIMER
 
-def generate_initial_conf():
-    # Initialize with default settings
-    default_settings = SettingsModel(
-        profile="default",
-        require=[],
-        exclude=[],
-        preferred=[],
-        resolutions=ResolutionConfig(
-            # Enable common resolutions by default
-            r2160p=True,  # 4K
-            r1080p=True,  # 1080p
-            r720p=True,   # 720p
-            r480p=False,  # 480p
-            r360p=False,  # 360p
-            unknown=True  # Allow unknown resolutions
-        ),
-        options=OptionsConfig(),
-        languages=LanguagesConfig(),
-        custom_ranks=CustomRanksConfig()
-    ).model_dump()
 
-    return {
-        "titles": [{
-            "raw_title": "Example.Movie.2020.1080p.BluRay.x264-Example",
-            "correct_title": ""
-        }],
-        "remove_trash": True,
-        "settings_model": default_settings
-    }
+@st.cache_resource(show_spinner=False)
+def get_conf_store():
+    return ConfStore()
 
 
 def save_conf_to_query_params():
-    """Save the current configuration to URL query parameters with compression."""
-    if 'conf' not in st.session_state:
+    """Mark the configuration as changed, it is written to the URL once at the end of the rerun."""
+    st.session_state['conf_dirty'] = True
+
+
+def conf_write_stats():
+    """Per session counts of URL conf writes, and of flushes skipped as the conf was unchanged."""
+    return st.session_state.setdefault('conf_write_stats', {"writes": 0, "skips": 0})
+
+
+def flush_conf_to_query_params():
+    """Save the current configuration to URL query parameters with compression, if it changed."""
+    if 'conf' not in st.session_state or not st.session_state.pop('conf_dirty', False):
         return
     
     try:
-        # Convert configuration to JSON string with compact encoding
-        conf_json = json.dumps(st.session_state.conf, separators=(',', ':'))
-        
-        # Compress the JSON string and save to query params
-        st.query_params['conf'] = compress_string(conf_json)
+        stats = conf_write_stats()
+        conf_json = ConfStore.canonical_json(st.session_state.conf)
+        source = st.session_state.get('conf_source')
+        if (conf_json == st.session_state.get('conf_saved_json')
+                and source and source[1] and source[0] == ('c' if short_links else 'conf')):
+            stats['skips'] += 1
+            return
+
+        if short_links:
+            # Only the key of the stored configuration goes in the URL
+            source = ('c', get_conf_store().put(st.session_state.conf))
+            st.query_params.pop('conf', None)
+        else:
+            # Only the differences from the initial configuration are encoded
+            source = ('conf', encode_conf(st.session_state.conf))
+            st.query_params.pop('c', None)
+        st.query_params[source[0]] = source[1]
+        # The session conf is what the URL now holds, the next rerun need not decode it
+        st.session_state['conf_source'] = source
+        st.session_state['conf_saved_json'] = conf_json
+        stats['writes'] += 1
         
     except Exception as e:
         st.error(f"Failed to save configuration to URL: {str(e)}")
@@ -393,13 +248,35 @@ def validate_conf(conf):
     return conf
 
 
+def conf_decode_stats():
+    """Per session counts and time of URL conf decodes, and of reruns that skipped them."""
+    return st.session_state.setdefault('conf_decode_stats', {"decodes": 0, "skips": 0, "seconds": 0.0, "last": 0.0})
+
+
 def load_conf_from_query_params():
     """Load configuration from URL query parameters with decompression and validation."""
     try:
         # Get configuration from query parameters
         compressed_conf = st.query_params.get("conf")
-        
-        if not compressed_conf:
+        conf_key = st.query_params.get("c")
+        source = ('c', conf_key) if conf_key else ('conf', compressed_conf)
+        stats = conf_decode_stats()
+
+        # The session conf already holds what the URL does, unless the URL was changed
+        if 'conf' in st.session_state and st.session_state.get('conf_source') == source:
+            stats['skips'] += 1
+            if short_links != bool(conf_key):
+                save_conf_to_query_params()
+            return
+
+        started = time.perf_counter()
+        if conf_key:
+            conf = get_conf_store().get(conf_key)
+            initial_bootstrap = conf is None
+            if conf is None:
+                st.error(f"No configuration stored under {conf_key}. Using default settings.")
+                conf = generate_initial_conf()
+        elif not compressed_conf:
             # No configuration in URL, use default
             conf = generate_initial_conf()
             initial_bootstrap = True
@@ -410,7 +287,7 @@ def load_conf_from_query_params():
                 if not conf_json:
                     raise ValueError("Failed to decompress configuration")
                     
-                conf = json.loads(conf_json)
+                conf = decode_conf_json(conf_json)
                 initial_bootstrap = False
             except (json.JSONDecodeError, ValueError) as e:
                 # Invalid JSON or decompression failed, use default
@@ -419,13 +296,21 @@ def load_conf_from_query_params():
                 initial_bootstrap = True
                 
         # Validate configuration structure
-        conf = validate_conf(conf)
+        with timer.stage("validate_conf"):
+            conf = validate_conf(conf)
         
         # Update session state
         st.session_state['conf'] = conf
+        st.session_state['conf_source'] = source
+        st.session_state['conf_saved_json'] = ConfStore.canonical_json(conf)
+        elapsed = time.perf_counter() - started
+        stats['decodes'] += 1
+        stats['seconds'] += elapsed
+        stats['last'] = elapsed
         
-        # Save validated configuration back to URL if this is initial bootstrap
-        if initial_bootstrap:
+        # Save validated configuration back to URL if this is initial bootstrap,
+        # or if the share link format was switched
+        if initial_bootstrap or short_links != bool(conf_key):
             save_conf_to_query_params()
             
     except Exception as e:
@@ -434,39 +319,20 @@ def load_conf_from_query_params():
         st.session_state['conf'] = generate_initial_conf()
 
 
-load_conf_from_query_params()
+with timer.stage("load_conf_from_query_params"):
+    load_conf_from_query_params()
 
 
-def get_settings_model(settings_model):
-    # Convert the custom ranks configuration
-    custom_ranks_config = CustomRanksConfig(
-        quality=QualityRankModel(**settings_model.get('custom_ranks', {}).get('quality', {})),
-        rips=RipsRankModel(**settings_model.get('custom_ranks', {}).get('rips', {})),
-        hdr=HdrRankModel(**settings_model.get('custom_ranks', {}).get('hdr', {})),
-        audio=AudioRankModel(**settings_model.get('custom_ranks', {}).get('audio', {})),
-        extras=ExtrasRankModel(**settings_model.get('custom_ranks', {}).get('extras', {})),
-        trash=TrashRankModel(**settings_model.get('custom_ranks', {}).get('trash', {}))
-    )
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _compile_settings(key, _settings_model, profile, _timer=NULL_TIMER):
+    return CompiledSettings(_settings_model, profile, _timer)
 
-    # Get resolution configuration
-    resolution_config = ResolutionConfig(**settings_model.get('resolutions', {}))
 
-    # Get options configuration
-    options_config = OptionsConfig(**settings_model.get('options', {}))
-
-    # Get languages configuration
-    languages_config = LanguagesConfig(**settings_model.get('languages', {}))
-
-    return SettingsModel(
-        profile=settings_model['profile'],
-        require=settings_model['require'],
-        exclude=settings_model['exclude'],
-        preferred=settings_model['preferred'],
-        resolutions=resolution_config,
-        options=options_config,
-        languages=languages_config,
-        custom_ranks=custom_ranks_config
-    )
+def get_compiled_settings(settings_model, profile=None):
+    """Return the settings model and RTN instance for a configuration, built once and shared across reruns and sessions."""
+    profile = profile or settings_model.get('profile', 'default')
+    with timer.stage("get_compiled_settings"):
+        return _compile_settings(settings_hash(settings_model, profile), settings_model, profile, timer)
 
 
 def remove_falsey(original_list):
@@ -487,6 +353,104 @@ class RivenRankingSettings(BaseModel):
     custom_ranks: Dict[str, CustomRank]
 
 
+def render_pattern_matches(patterns, text, *, match, no_match, timeout=PATTERN_TIMEOUT):
+    """Show how each pattern matches `text` and return the sources of the matching patterns.
+
+    `match` and `no_match` are `(alert, message)` pairs, the message being formatted
+    with the pattern `source` (as entered) and `pattern` (without enclosing slashes).
+    Patterns running longer than `timeout` seconds are reported as too slow.
+    """
+    matched = []
+    with timer.stage("pattern evaluation"):
+        matcher = pattern_matcher(patterns)
+        results = matcher.matches(text, timeout)
+    for compiled, matches in zip(matcher.patterns, results):
+        if compiled.error:
+            st.error(f"❌ Invalid regex pattern `{compiled.source}`: {compiled.error}")
+            continue
+        if matches is None:
+            st.error(f"🐢 Pattern `{compiled.source}` is too slow on `{text}` (over {timeout}s), "
+                     "it is skipped when ranking this title")
+            continue
+
+        alert, message = match if matches else no_match
+        alert(message.format(source=compiled.source, pattern=compiled.pattern))
+        if matches:
+            matched.append(compiled.source)
+            for i, (start, end, found) in enumerate(matches, 1):
+                st.code(f"Match {i}: '{found}' at position {start}-{end}")
+            if compiled.case_sensitive:
+                st.info("Note: This was a case-sensitive match")
+    return matched
+
+
+def render_pattern_profiler(settings_model):
+    st.markdown("""
+    Time every saved required, excluded and preferred pattern over a corpus of titles
+    to find the expensive ones. Patterns are listed from the most to the least expensive.
+    """)
+    sources = ["Reference corpus", "Test Titles"]
+    corpus_results = st.session_state.get('corpus_results')
+    # Only plain ranking keeps a result row, with its correct title, for every title. Streamed
+    # results keep a preview only, the other modes keep rows of their own shape
+    if corpus_results and corpus_results['mode'] == "rank":
+        sources.append("Last ranked corpus")
+    sources.append("Upload a titles file")
+
+    source = st.radio("Corpus", sources, horizontal=True, key="profiler_source")
+    uploaded_file = None
+    if source == "Upload a titles file":
+        uploaded_file = st.file_uploader("Titles file", type=['txt', 'csv'], key="profiler_file")
+
+    if st.button("⏱️ Profile Patterns"):
+        try:
+            if source == "Reference corpus":
+                titles = load_reference_titles()
+            elif source == "Test Titles":
+                titles = [(title['raw_title'], title['correct_title']) for title in st.session_state.conf['titles']]
+            elif source == "Last ranked corpus":
+                titles = [(row['raw_title'], row['correct_title']) for row in st.session_state['corpus_results']['rows']]
+            else:
+                titles = read_uploaded_titles(uploaded_file) if uploaded_file is not None else []
+        except Exception as err:
+            st.error(f"❌ Error reading titles: {str(err)}")
+            titles = []
+
+        raw_titles = [raw_title for raw_title, _ in titles if raw_title]
+        if raw_titles:
+            with st.spinner(f"Profiling patterns over {len(raw_titles):,} titles..."):
+                st.session_state['pattern_profile'] = {
+                    "titles": len(raw_titles),
+                    "rows": profile_patterns(settings_model, raw_titles)
+                }
+        else:
+            st.warning("⚠️ No titles to profile")
+
+    results = st.session_state.get('pattern_profile')
+    if not results:
+        return
+    if not results['rows']:
+        st.info("No patterns to profile. Add some patterns above.")
+        return
+
+    st.caption(f"{len(results['rows'])} patterns over {results['titles']:,} titles")
+    st.dataframe(
+        results['rows'],
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "field": st.column_config.TextColumn("List"),
+            "pattern": st.column_config.TextColumn("Pattern"),
+            "total_ms": st.column_config.NumberColumn("Total (ms)", format="%.2f"),
+            "mean_us": st.column_config.NumberColumn("Mean (µs/title)", format="%.1f"),
+            "p99_us": st.column_config.NumberColumn("p99 (µs/title)", format="%.1f"),
+            "matched_titles": st.column_config.NumberColumn("Matched Titles"),
+            "timeouts": st.column_config.NumberColumn(
+                "Timeouts", help=f"Titles on which the pattern ran over {PATTERN_TIMEOUT}s"),
+        }
+    )
+
+
 def render_settings():
     st.header('🛠️ Settings Configuration')
     st.markdown("""
@@ -577,25 +541,22 @@ Note: Profiles are meant to be a starting point. You should fine-tune the settin
             )
             
             if test_pattern and test_string:
-                try:
-                    # Check if pattern is enclosed in slashes for case-sensitivity
-                    is_case_sensitive = test_pattern.startswith('/') and test_pattern.endswith('/') and len(test_pattern) > 2
-                    if is_case_sensitive:
-                        # Remove the enclosing slashes and compile without IGNORECASE flag
-                        pattern = regex.compile(test_pattern[1:-1])
-                    else:
-                        # Non-case-sensitive pattern
-                        pattern = regex.compile(test_pattern, regex.IGNORECASE)
-                    
-                    match = pattern.search(test_string)
-                    if match:
-                        st.success(f"✅ Pattern matches! Found: {match.group(0)}")
-                        if is_case_sensitive:
-                            st.info("Note: This is a case-sensitive match")
+                compiled = compile_pattern(test_pattern)
+                if compiled.error:
+                    st.error(f"❌ Invalid regex pattern: {compiled.error}")
+                else:
+                    try:
+                        match = compiled.regex.search(test_string, timeout=PATTERN_TIMEOUT)
+                    except TimeoutError:
+                        st.error(f"🐢 Pattern is too slow on this string (over {PATTERN_TIMEOUT}s), "
+                                 "it would be skipped when ranking such titles")
                     else:
-                        st.error("❌ Pattern does not match")
-                except Exception as e:
-                    st.error(f"❌ Invalid regex pattern: {str(e)}")
+                        if match:
+                            st.success(f"✅ Pattern matches! Found: {match.group(0)}")
+                            if compiled.case_sensitive:
+                                st.info("Note: This is a case-sensitive match")
+                        else:
+                            st.error("❌ Pattern does not match")
             
             st.markdown("---")
             
@@ -623,33 +584,14 @@ Note: Profiles are meant to be a starting point. You should fine-tune the settin
                 
                 if test_string_required:
                     st.markdown("#### Test Results:")
-                    any_patterns = False
-                    for pattern in [p.strip() for p in current_required_text.split('\n') if p.strip()]:
-                        any_patterns = True
-                        try:
-                            # Check if pattern is enclosed in slashes for case-sensitivity
-                            is_case_sensitive = pattern.startswith('/') and pattern.endswith('/') and len(pattern) > 2
-                            if is_case_sensitive:
-                                # Remove the enclosing slashes and compile without IGNORECASE flag
-                                regex_pattern = regex.compile(pattern[1:-1])
-                            else:
-                                # Non-case-sensitive pattern
-                                regex_pattern = regex.compile(pattern, regex.IGNORECASE)
-                            
-                            # Find all matches
-                            matches = list(regex_pattern.finditer(test_string_required))
-                            if matches:
-                                st.success(f"✅ Pattern `{pattern}` matches!")
-                                for i, match in enumerate(matches, 1):
-                                    st.code(f"Match {i}: '{match.group(0)}' at position {match.start()}-{match.end()}")
-                                if is_case_sensitive:
-                                    st.info("Note: This was a case-sensitive match")
-                            else:
-                                st.error(f"❌ Pattern `{pattern}` does not match")
-                        except Exception as e:
-                            st.error(f"❌ Invalid regex pattern `{pattern}`: {str(e)}")
+                    patterns = [p.strip() for p in current_required_text.split('\n') if p.strip()]
+                    render_pattern_matches(
+                        patterns, test_string_required,
+                        match=(st.success, "✅ Pattern `{source}` matches!"),
+                        no_match=(st.error, "❌ Pattern `{source}` does not match")
+                    )
                     
-                    if not any_patterns:
+                    if not patterns:
                         st.info("No patterns to test. Add some patterns above.")
             
             st.markdown("---")
@@ -678,33 +620,14 @@ Note: Profiles are meant to be a starting point. You should fine-tune the settin
                 
                 if test_string_excluded:
                     st.markdown("#### Test Results:")
-                    any_patterns = False
-                    for pattern in [p.strip() for p in current_excluded_text.split('\n') if p.strip()]:
-                        any_patterns = True
-                        try:
-                            # Check if pattern is enclosed in slashes for case-sensitivity
-                            is_case_sensitive = pattern.startswith('/') and pattern.endswith('/') and len(pattern) > 2
-                            if is_case_sensitive:
-                                # Remove the enclosing slashes and compile without IGNORECASE flag
-                                regex_pattern = regex.compile(pattern[1:-1])
-                            else:
-                                # Non-case-sensitive pattern
-                                regex_pattern = regex.compile(pattern, regex.IGNORECASE)
-                            
-                            # Find all matches
-                            matches = list(regex_pattern.finditer(test_string_excluded))
-                            if matches:
-                                st.error(f"❌ Pattern `{pattern}` matches (would exclude)!")
-                                for i, match in enumerate(matches, 1):
-                                    st.code(f"Match {i}: '{match.group(0)}' at position {match.start()}-{match.end()}")
-                                if is_case_sensitive:
-                                    st.info("Note: This was a case-sensitive match")
-                            else:
-                                st.success(f"✅ Pattern `{pattern}` does not match (would not exclude)")
-                        except Exception as e:
-                            st.error(f"❌ Invalid regex pattern `{pattern}`: {str(e)}")
+                    patterns = [p.strip() for p in current_excluded_text.split('\n') if p.strip()]
+                    render_pattern_matches(
+                        patterns, test_string_excluded,
+                        match=(st.error, "❌ Pattern `{source}` matches (would exclude)!"),
+                        no_match=(st.success, "✅ Pattern `{source}` does not match (would not exclude)")
+                    )
                     
-                    if not any_patterns:
+                    if not patterns:
                         st.info("No patterns to test. Add some patterns above.")
             
             st.markdown("---")
@@ -733,33 +656,14 @@ Note: Profiles are meant to be a starting point. You should fine-tune the settin
                 
                 if test_string_preferred:
                     st.markdown("#### Test Results:")
-                    any_patterns = False
-                    for pattern in [p.strip() for p in current_preferred_text.split('\n') if p.strip()]:
-                        any_patterns = True
-                        try:
-                            # Check if pattern is enclosed in slashes for case-sensitivity
-                            is_case_sensitive = pattern.startswith('/') and pattern.endswith('/') and len(pattern) > 2
-                            if is_case_sensitive:
-                                # Remove the enclosing slashes and compile without IGNORECASE flag
-                                regex_pattern = regex.compile(pattern[1:-1])
-                            else:
-                                # Non-case-sensitive pattern
-                                regex_pattern = regex.compile(pattern, regex.IGNORECASE)
-                            
-                            # Find all matches
-                            matches = list(regex_pattern.finditer(test_string_preferred))
-                            if matches:
-                                st.success(f"✅ Pattern `{pattern}` matches (would boost)!")
-                                for i, match in enumerate(matches, 1):
-                                    st.code(f"Match {i}: '{match.group(0)}' at position {match.start()}-{match.end()}")
-                                if is_case_sensitive:
-                                    st.info("Note: This was a case-sensitive match")
-                            else:
-                                st.warning(f"⚠️ Pattern `{pattern}` does not match (no boost)")
-                        except Exception as e:
-                            st.error(f"❌ Invalid regex pattern `{pattern}`: {str(e)}")
+                    patterns = [p.strip() for p in current_preferred_text.split('\n') if p.strip()]
+                    render_pattern_matches(
+                        patterns, test_string_preferred,
+                        match=(st.success, "✅ Pattern `{source}` matches (would boost)!"),
+                        no_match=(st.warning, "⚠️ Pattern `{source}` does not match (no boost)")
+                    )
                     
-                    if not any_patterns:
+                    if not patterns:
                         st.info("No patterns to test. Add some patterns above.")
 
             # Common patterns suggestions
@@ -792,6 +696,9 @@ Note: Profiles are meant to be a starting point. You should fine-tune the settin
                 st.success("✅ Changes saved!")
                 st.rerun()
 
+        with st.expander("⏱️ Pattern Cost Profiler"):
+            render_pattern_profiler(settings_model)
+
     with settings_tabs[2]:
         with st.form("languages_form"):
             st.markdown("""
@@ -1133,7 +1040,31 @@ Example:
                         st.success(f"✅ {category_name} ranks saved!")
 
 
+@st.cache_resource(max_entries=1024, show_spinner=False)
+def _rank_test_case(settings_key, raw_title, correct_title, remove_trash, _compiled):
+    """Rank one test case, memoized until its title or the settings change.
+
+    Returns the RTN instance used, the slow patterns it left out, and either
+    the ranked torrent or the ranking error.
+    """
+    with timer.stage("pattern guard"):
+        rtn, slow_patterns = guard_patterns(_compiled.rtn, raw_title)
+    try:
+        with timer.stage("rtn.rank"):
+            torrent = rank_torrent(rtn,
+                                   raw_title=raw_title,
+                                   correct_title=correct_title,
+                                   infohash=PLACEHOLDER_INFOHASH,
+                                   remove_trash=remove_trash,
+                                   speed_mode=_compiled.speed_mode)
+    except Exception as err:
+        return rtn, slow_patterns, None, str(err)
+    return rtn, slow_patterns, torrent, None
+
+
+@st.fragment
 def render_title(*, conf, index, initial_raw_title, initial_correct_title):
+    """One test case. Runs as a fragment, so analyzing it does not rerun the other test cases."""
     with st.container(border=True):
         unique_key = f"{index}_{initial_raw_title}_{initial_correct_title}"
         
@@ -1142,11 +1073,11 @@ def render_title(*, conf, index, initial_raw_title, initial_correct_title):
             st.markdown(f"### 🎬 Test Case #{index + 1}")
         with col2:
             if index > 0:
-                def delete_current_title():
+                if st.button("🗑️ Remove", key=f"render_title_form_{unique_key}_delete"):
                     del st.session_state.conf['titles'][index]
                     save_conf_to_query_params()
-                st.button("🗑️ Remove", on_click=delete_current_title,
-                          key=f"render_title_form_{unique_key}_delete")
+                    # The other test cases move up, redraw the whole page
+                    st.rerun()
 
         with st.form(f"render_title_form_{unique_key}", border=False):
             col1, col2 = st.columns(2)
@@ -1175,31 +1106,25 @@ def render_title(*, conf, index, initial_raw_title, initial_correct_title):
                     "correct_title": correct_title_text_input
                 }
                 save_conf_to_query_params()
+                # A fragment rerun does not reach the end of the script, write the URL now
+                flush_conf_to_query_params()
 
         if raw_title_text_input:
             torrent = None
             error_occurred = False
             
             try:
-                ranking_model = rtn_rank_models.get(
-                    st.session_state.conf['settings_model']['profile'],
-                    DefaultRanking()  # Default to DefaultRanking if profile not found
+                compiled = get_compiled_settings(st.session_state.conf['settings_model'])
+                # Reuses the previous result while neither the title nor the settings change
+                rtn, slow_patterns, torrent, ranking_error = _rank_test_case(
+                    compiled.key, raw_title_text_input, correct_title_text_input, conf['remove_trash'], compiled
                 )
-
-                settings_model = get_settings_model(
-                    st.session_state.conf['settings_model'])
-                rtn = RTN(settings=settings_model,
-                          ranking_model=ranking_model)
-                info_hash = "BE417768B5C3C5C1D9BCB2E7C119196DD76B5570"
-
-                # Use speed_mode from options config
-                speed_mode = settings_model.options.get("enable_fetch_speed_mode", True)
-                
-                torrent = rtn.rank(raw_title=raw_title_text_input,
-                                   correct_title=correct_title_text_input, 
-                                   infohash=info_hash, 
-                                   remove_trash=conf['remove_trash'],
-                                   speed_mode=speed_mode)
+                settings_model = rtn.settings
+                for slow in slow_patterns:
+                    st.warning(f"🐢 {slow.field.title()} pattern `{slow.source}` is too slow on `{slow.title}` "
+                               f"(over {PATTERN_TIMEOUT}s), ranking without it")
+                if ranking_error:
+                    raise RuntimeError(ranking_error)
 
             except Exception as err:
                 error_occurred = True
@@ -1226,261 +1151,820 @@ def render_title(*, conf, index, initial_raw_title, initial_correct_title):
                 except Exception as err:
                     st.error(f"❌ Error displaying metrics: {str(err)}")
 
-                # Detailed analysis in tabs
-                analysis_tabs = st.tabs([
-                    "📊 Overview",
-                    "🔍 Parsed Data",
-                    "⚡ Quality Analysis",
-                    "🎯 Pattern Matches",
-                    "📈 Additional Info"
-                ])
+                # Detailed analysis, only the section the user opens is computed
+                render_analysis(torrent, settings_model, raw_title_text_input, unique_key)
 
-                with analysis_tabs[0]:
-                    try:
-                        col1, col2 = st.columns(2)
-                        
-                        with col1:
-                            st.markdown("### 📝 Basic Information")
-                            st.markdown(f"**Parsed Title:** {torrent.data.parsed_title}")
-                            st.markdown(f"**Year:** {torrent.data.year or 'N/A'}")
-                            st.markdown(f"**Type:** {torrent.data.type.title()}")
-                            if torrent.data.seasons:
-                                st.markdown(f"**Seasons:** {', '.join(map(str, torrent.data.seasons))}")
-                            if torrent.data.episodes:
-                                st.markdown(f"**Episodes:** {', '.join(map(str, torrent.data.episodes))}")
-                            if torrent.data.group:
-                                st.markdown(f"**Release Group:** {torrent.data.group}")
-                        
-                        with col2:
-                            st.markdown("### 🎥 Media Information")
-                            st.markdown(f"**Resolution:** {torrent.data.resolution}")
-                            if torrent.data.quality:
-                                st.markdown(f"**Quality:** {torrent.data.quality}")
-                            if torrent.data.codec:
-                                st.markdown(f"**Codec:** {torrent.data.codec}")
-                            if torrent.data.audio:
-                                st.markdown(f"**Audio:** {', '.join(torrent.data.audio)}")
-                            if torrent.data.hdr:
-                                st.markdown(f"**HDR:** {', '.join(torrent.data.hdr)}")
-                    except Exception as err:
-                        st.error(f"❌ Error displaying overview: {str(err)}")
 
-                with analysis_tabs[1]:
-                    try:
-                        st.json(torrent.data.model_dump())
-                    except Exception as err:
-                        st.error(f"❌ Error displaying parsed data: {str(err)}")
+ANALYSIS_SECTIONS = [
+    "📊 Overview",
+    "🔍 Parsed Data",
+    "⚡ Quality Analysis",
+    "🎯 Pattern Matches",
+    "📈 Additional Info"
+]
 
-                with analysis_tabs[2]:
-                    try:
-                        col1, col2 = st.columns(2)
-                        
-                        with col1:
-                            st.markdown("### 🎬 Video Quality")
-                            quality_attrs = {
-                                "Resolution": torrent.data.resolution,
-                                "Quality": torrent.data.quality,
-                                "Codec": torrent.data.codec,
-                                "Bit Depth": torrent.data.bit_depth,
-                                "HDR": ", ".join(torrent.data.hdr) if torrent.data.hdr else None
-                            }
-                            for attr, value in quality_attrs.items():
-                                if value:
-                                    st.markdown(f"**{attr}:** {value}")
-                        
-                        with col2:
-                            st.markdown("### 🔊 Audio Quality")
-                            audio_attrs = {
-                                "Audio Codecs": ", ".join(torrent.data.audio) if torrent.data.audio else None,
-                                "Channels": ", ".join(torrent.data.channels) if torrent.data.channels else None
-                            }
-                            for attr, value in audio_attrs.items():
-                                if value:
-                                    st.markdown(f"**{attr}:** {value}")
-                            
-                            if torrent.data.dubbed:
-                                st.markdown("**Dubbed:** ✅")
-                            if torrent.data.subbed:
-                                st.markdown("**Subbed:** ✅")
-                    except Exception as err:
-                        st.error(f"❌ Error displaying quality analysis: {str(err)}")
 
-                with analysis_tabs[3]:
-                    try:
-                        st.markdown("### 🎯 Pattern Matches")
-                        
-                        # Required Patterns
-                        st.markdown("#### Required Patterns")
-                        required_patterns = settings_model.require
-                        if required_patterns:
-                            any_required_matches = False
-                            for pattern_str in required_patterns:
-                                try:
-                                    # Check if pattern is case-sensitive (only if it's a string)
-                                    if isinstance(pattern_str, str):
-                                        is_case_sensitive = pattern_str.startswith('/') and pattern_str.endswith('/') and len(pattern_str) > 2
-                                        if is_case_sensitive:
-                                            pattern = pattern_str[1:-1]
-                                            regex_pattern = regex.compile(pattern)
-                                        else:
-                                            pattern = pattern_str
-                                            regex_pattern = regex.compile(pattern, regex.IGNORECASE)
-                                    else:
-                                        # If it's already a compiled pattern, use it directly
-                                        regex_pattern = pattern_str
-                                        pattern = str(pattern_str.pattern)
-                                        is_case_sensitive = not bool(regex_pattern.flags & regex.IGNORECASE)
-                                    
-                                    matches = list(regex_pattern.finditer(raw_title_text_input))
-                                    if matches:
-                                        any_required_matches = True
-                                        st.success(f"✅ Pattern `{pattern}` matches:")
-                                        for i, match in enumerate(matches, 1):
-                                            st.code(f"Match {i}: '{match.group(0)}' at position {match.start()}-{match.end()}")
-                                        if is_case_sensitive:
-                                            st.info("Note: This was a case-sensitive match")
-                                    else:
-                                        st.error(f"❌ Pattern `{pattern}` does not match")
-                                except Exception as e:
-                                    st.error(f"❌ Invalid regex pattern `{pattern_str}`: {str(e)}")
-                            
-                            matches_required = check_required(torrent.data, settings_model)
-                            st.markdown(
-                                f"**Overall Required Status:** {emoji_bool(matches_required)}",
-                                help="Title must match ALL required patterns"
-                            )
-                        else:
-                            st.info("No required patterns configured")
-                        
-                        st.markdown("---")
-                        
-                        # Excluded Patterns
-                        st.markdown("#### Excluded Patterns")
-                        excluded_patterns = settings_model.exclude
-                        if excluded_patterns:
-                            failed_keys = []
-                            for pattern_str in excluded_patterns:
-                                try:
-                                    # Check if pattern is case-sensitive (only if it's a string)
-                                    if isinstance(pattern_str, str):
-                                        is_case_sensitive = pattern_str.startswith('/') and pattern_str.endswith('/') and len(pattern_str) > 2
-                                        if is_case_sensitive:
-                                            pattern = pattern_str[1:-1]
-                                            regex_pattern = regex.compile(pattern)
-                                        else:
-                                            pattern = pattern_str
-                                            regex_pattern = regex.compile(pattern, regex.IGNORECASE)
-                                    else:
-                                        # If it's already a compiled pattern, use it directly
-                                        regex_pattern = pattern_str
-                                        pattern = str(pattern_str.pattern)
-                                        is_case_sensitive = not bool(regex_pattern.flags & regex.IGNORECASE)
-                                    
-                                    matches = list(regex_pattern.finditer(raw_title_text_input))
-                                    if matches:
-                                        st.error(f"❌ Pattern `{pattern}` matches (would exclude):")
-                                        for i, match in enumerate(matches, 1):
-                                            st.code(f"Match {i}: '{match.group(0)}' at position {match.start()}-{match.end()}")
-                                        if is_case_sensitive:
-                                            st.info("Note: This was a case-sensitive match")
-                                        failed_keys.append(pattern_str)
-                                    else:
-                                        st.success(f"✅ Pattern `{pattern}` does not match (would not exclude)")
-                                except Exception as e:
-                                    st.error(f"❌ Invalid regex pattern `{pattern_str}`: {str(e)}")
-                            
-                            matches_exclude = check_exclude(torrent.data, settings_model, failed_keys)
-                            st.markdown(
-                                f"**Overall Exclude Status:** {emoji_bool(not matches_exclude)}",
-                                help="Title must not match ANY excluded patterns"
-                            )
-                        else:
-                            st.info("No excluded patterns configured")
-                        
-                        st.markdown("---")
-                        
-                        # Preferred Patterns
-                        st.markdown("#### Preferred Patterns")
-                        preferred_patterns = settings_model.preferred
-                        if preferred_patterns:
-                            any_preferred_matches = False
-                            for pattern_str in preferred_patterns:
-                                try:
-                                    # Check if pattern is case-sensitive (only if it's a string)
-                                    if isinstance(pattern_str, str):
-                                        is_case_sensitive = pattern_str.startswith('/') and pattern_str.endswith('/') and len(pattern_str) > 2
-                                        if is_case_sensitive:
-                                            pattern = pattern_str[1:-1]
-                                            regex_pattern = regex.compile(pattern)
-                                        else:
-                                            pattern = pattern_str
-                                            regex_pattern = regex.compile(pattern, regex.IGNORECASE)
-                                    else:
-                                        # If it's already a compiled pattern, use it directly
-                                        regex_pattern = pattern_str
-                                        pattern = str(pattern_str.pattern)
-                                        is_case_sensitive = not bool(regex_pattern.flags & regex.IGNORECASE)
-                                    
-                                    matches = list(regex_pattern.finditer(raw_title_text_input))
-                                    if matches:
-                                        any_preferred_matches = True
-                                        st.success(f"✅ Pattern `{pattern}` matches (rank boost):")
-                                        for i, match in enumerate(matches, 1):
-                                            st.code(f"Match {i}: '{match.group(0)}' at position {match.start()}-{match.end()}")
-                                        if is_case_sensitive:
-                                            st.info("Note: This was a case-sensitive match")
-                                    else:
-                                        st.warning(f"⚠️ Pattern `{pattern}` does not match (no boost)")
-                                except Exception as e:
-                                    st.error(f"❌ Invalid regex pattern `{pattern_str}`: {str(e)}")
-                            
-                            matches_preferred = calculate_preferred(torrent.data, settings_model) > 0
-                            st.markdown(
-                                f"**Overall Preferred Status:** {emoji_bool(matches_preferred)}",
-                                help="Title gets a rank boost for each preferred pattern that matches"
-                            )
-                        else:
-                            st.info("No preferred patterns configured")
-                        
-                        st.markdown("---")
-                        
-                        st.markdown("### 🚩 Special Flags")
-                        flags = {
-                            "Extended": torrent.data.extended,
-                            "Converted": torrent.data.converted,
-                            "Hardcoded": torrent.data.hardcoded,
-                            "Proper": torrent.data.proper,
-                            "Repack": torrent.data.repack,
-                            "Retail": torrent.data.retail,
-                            "Remastered": torrent.data.remastered,
-                            "Unrated": torrent.data.unrated,
-                            "Documentary": torrent.data.documentary,
-                            "Scene Release": torrent.data.scene
-                        }
-                        for flag, value in flags.items():
-                            if value:
-                                st.markdown(f"- {flag}")
-                    except Exception as err:
-                        st.error(f"❌ Error displaying pattern matches: {str(err)}")
+@st.fragment
+def render_analysis(torrent, settings_model, raw_title, key):
+    """Detailed analysis of a ranked title, computing only the section the user opens.
+
+    Runs as a fragment, so switching sections does not rerun the whole page.
+    """
+    section = st.segmented_control("Analysis", ANALYSIS_SECTIONS, key=f"analysis_{key}",
+                                   label_visibility="collapsed")
+
+    if section == ANALYSIS_SECTIONS[0]:
+        try:
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.markdown("### 📝 Basic Information")
+                st.markdown(f"**Parsed Title:** {torrent.data.parsed_title}")
+                st.markdown(f"**Year:** {torrent.data.year or 'N/A'}")
+                st.markdown(f"**Type:** {torrent.data.type.title()}")
+                if torrent.data.seasons:
+                    st.markdown(f"**Seasons:** {', '.join(map(str, torrent.data.seasons))}")
+                if torrent.data.episodes:
+                    st.markdown(f"**Episodes:** {', '.join(map(str, torrent.data.episodes))}")
+                if torrent.data.group:
+                    st.markdown(f"**Release Group:** {torrent.data.group}")
+            
+            with col2:
+                st.markdown("### 🎥 Media Information")
+                st.markdown(f"**Resolution:** {torrent.data.resolution}")
+                if torrent.data.quality:
+                    st.markdown(f"**Quality:** {torrent.data.quality}")
+                if torrent.data.codec:
+                    st.markdown(f"**Codec:** {torrent.data.codec}")
+                if torrent.data.audio:
+                    st.markdown(f"**Audio:** {', '.join(torrent.data.audio)}")
+                if torrent.data.hdr:
+                    st.markdown(f"**HDR:** {', '.join(torrent.data.hdr)}")
+        except Exception as err:
+            st.error(f"❌ Error displaying overview: {str(err)}")
+
+    elif section == ANALYSIS_SECTIONS[1]:
+        try:
+            st.json(torrent.data.model_dump())
+        except Exception as err:
+            st.error(f"❌ Error displaying parsed data: {str(err)}")
+
+    elif section == ANALYSIS_SECTIONS[2]:
+        try:
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.markdown("### 🎬 Video Quality")
+                quality_attrs = {
+                    "Resolution": torrent.data.resolution,
+                    "Quality": torrent.data.quality,
+                    "Codec": torrent.data.codec,
+                    "Bit Depth": torrent.data.bit_depth,
+                    "HDR": ", ".join(torrent.data.hdr) if torrent.data.hdr else None
+                }
+                for attr, value in quality_attrs.items():
+                    if value:
+                        st.markdown(f"**{attr}:** {value}")
+            
+            with col2:
+                st.markdown("### 🔊 Audio Quality")
+                audio_attrs = {
+                    "Audio Codecs": ", ".join(torrent.data.audio) if torrent.data.audio else None,
+                    "Channels": ", ".join(torrent.data.channels) if torrent.data.channels else None
+                }
+                for attr, value in audio_attrs.items():
+                    if value:
+                        st.markdown(f"**{attr}:** {value}")
+                
+                if torrent.data.dubbed:
+                    st.markdown("**Dubbed:** ✅")
+                if torrent.data.subbed:
+                    st.markdown("**Subbed:** ✅")
+        except Exception as err:
+            st.error(f"❌ Error displaying quality analysis: {str(err)}")
+
+    elif section == ANALYSIS_SECTIONS[3]:
+        try:
+            st.markdown("### 🎯 Pattern Matches")
+            
+            # Required Patterns
+            st.markdown("#### Required Patterns")
+            required_patterns = st.session_state.conf['settings_model']['require']
+            if required_patterns:
+                render_pattern_matches(
+                    required_patterns, raw_title,
+                    match=(st.success, "✅ Pattern `{pattern}` matches:"),
+                    no_match=(st.error, "❌ Pattern `{pattern}` does not match")
+                )
+                
+                matches_required = check_required(torrent.data, settings_model)
+                st.markdown(
+                    f"**Overall Required Status:** {emoji_bool(matches_required)}",
+                    help="Title must match ALL required patterns"
+                )
+            else:
+                st.info("No required patterns configured")
+            
+            st.markdown("---")
+            
+            # Excluded Patterns
+            st.markdown("#### Excluded Patterns")
+            excluded_patterns = st.session_state.conf['settings_model']['exclude']
+            if excluded_patterns:
+                render_pattern_matches(
+                    excluded_patterns, raw_title,
+                    match=(st.error, "❌ Pattern `{pattern}` matches (would exclude):"),
+                    no_match=(st.success, "✅ Pattern `{pattern}` does not match (would not exclude)")
+                )
+                
+                matches_exclude = check_exclude(torrent.data, settings_model, set())
+                st.markdown(
+                    f"**Overall Exclude Status:** {emoji_bool(not matches_exclude)}",
+                    help="Title must not match ANY excluded patterns"
+                )
+            else:
+                st.info("No excluded patterns configured")
+            
+            st.markdown("---")
+            
+            # Preferred Patterns
+            st.markdown("#### Preferred Patterns")
+            preferred_patterns = st.session_state.conf['settings_model']['preferred']
+            if preferred_patterns:
+                render_pattern_matches(
+                    preferred_patterns, raw_title,
+                    match=(st.success, "✅ Pattern `{pattern}` matches (rank boost):"),
+                    no_match=(st.warning, "⚠️ Pattern `{pattern}` does not match (no boost)")
+                )
+                
+                matches_preferred = calculate_preferred(torrent.data, settings_model) > 0
+                st.markdown(
+                    f"**Overall Preferred Status:** {emoji_bool(matches_preferred)}",
+                    help="Title gets a rank boost for each preferred pattern that matches"
+                )
+            else:
+                st.info("No preferred patterns configured")
+            
+            st.markdown("---")
+            
+            st.markdown("### 🚩 Special Flags")
+            flags = {
+                "Extended": torrent.data.extended,
+                "Converted": torrent.data.converted,
+                "Hardcoded": torrent.data.hardcoded,
+                "Proper": torrent.data.proper,
+                "Repack": torrent.data.repack,
+                "Retail": torrent.data.retail,
+                "Remastered": torrent.data.remastered,
+                "Unrated": torrent.data.unrated,
+                "Documentary": torrent.data.documentary,
+                "Scene Release": torrent.data.scene
+            }
+            for flag, value in flags.items():
+                if value:
+                    st.markdown(f"- {flag}")
+        except Exception as err:
+            st.error(f"❌ Error displaying pattern matches: {str(err)}")
+
+    elif section == ANALYSIS_SECTIONS[4]:
+        try:
+            st.markdown("### 📊 Additional Information")
+            additional_info = {
+                "Seeders": torrent.seeders or "N/A",
+                "Leechers": torrent.leechers or "N/A",
+                "Infohash": torrent.infohash,
+            }
+            
+            for label, value in additional_info.items():
+                st.markdown(f"**{label}:** {value}")
+                
+            if torrent.trackers:
+                st.markdown("### 🌐 Trackers")
+                for tracker in torrent.trackers:
+                    st.markdown(f"- {tracker}")
+        except Exception as err:
+            st.error(f"❌ Error displaying additional info: {str(err)}")
+
+
+def read_uploaded_titles(uploaded_file):
+    """Titles of an uploaded `.txt` (tab separated) or `.csv` file."""
+    text = uploaded_file.getvalue().decode('utf-8', errors='replace')
+    if uploaded_file.name.lower().endswith('.csv'):
+        return read_title_csv(text)
+    return read_title_lines(text.splitlines())
+
+
+def read_diff_settings(settings_file, conf_text):
+    """Settings model dict to diff against, from an exported settings JSON or a conf blob or URL."""
+    if settings_file is None and not conf_text.strip():
+        raise ValueError("Upload a settings JSON or paste a conf to diff against")
+    settings_json = settings_file.getvalue().decode('utf-8') if settings_file is not None else None
+    return load_settings(settings_json, conf_text)[0]
+
+
+# Modes of the Rank Corpus page, also the mode of the results they leave in the session
+CORPUS_MODES = {
+    "rank": "📊 Rank",
+    "stream": "🌊 Stream",
+    "profiles": "⚖️ Compare profiles",
+    "media": "🏆 Best per media item",
+    "diff": "🔀 Diff settings"
+}
 
-                with analysis_tabs[4]:
+
+def render_rank_corpus():
+    st.header("📋 Rank Corpus")
+    st.markdown("""
+    Rank a whole list of titles with the current settings in one pass. Paste one raw title per line,
+    optionally followed by a tab and the correct title, or upload a `.txt` file in the same format
+    or a `.csv` file with `raw_title` and `correct_title` columns.
+    """)
+
+    with st.form("rank_corpus_form"):
+        pasted_titles = st.text_area(
+            "Titles (one per line)",
+            height=200,
+            placeholder="Example.Movie.2020.1080p.BluRay.x264-Example"
+        )
+        uploaded_file = st.file_uploader("...or upload a titles file", type=['txt', 'csv'])
+        mode = st.radio(
+            "Mode", list(CORPUS_MODES), format_func=CORPUS_MODES.get, horizontal=True, key="corpus_mode",
+            help="""
+- **Rank**: rank every title with the current settings
+- **Stream**: for very large files, rank a chunk at a time into a compressed download
+- **Compare profiles**: score the titles against the default, best and custom profiles (each with your custom rank overrides) side by side
+- **Best per media item**: keep the best titles of every movie or episode, like riven does when it picks a torrent
+- **Diff settings**: list the titles whose fate changes with other settings
+
+The options of each mode are below.
+"""
+        )
+        with st.expander("📊 Rank"):
+            dedupe = st.checkbox(
+                "Rank each distinct title once", value=True,
+                help="Indexer dumps often list the same release many times. Duplicates are ranked once and "
+                     "their result is copied to every occurrence."
+            )
+            dedupe_normalize = st.checkbox(
+                "Also merge titles differing only in separators and case",
+                help="Treats `Movie.2020.1080p` and `movie 2020 1080p` as the same release, ranked with the "
+                     "first spelling seen. RTN does read separators and case, so some ranks can differ "
+                     "from ranking every spelling on its own."
+            )
+            parallel = st.checkbox(
+                "Rank on a process pool",
+                help="Worth it for large corpora only, starting the worker processes takes a few seconds."
+            )
+            col1, col2 = st.columns(2)
+            with col1:
+                workers = st.number_input("Workers", min_value=1, value=os.cpu_count() or 1)
+            with col2:
+                chunk_size = st.number_input("Chunk size", min_value=1, value=1000, step=100,
+                                             help="Number of titles sent to a worker at a time")
+        with st.expander("🌊 Stream"):
+            st.caption("Titles are read line by line and ranked a chunk at a time, results go to a compressed "
+                       "JSONL download and only the first rows are kept on the page. The uploaded file itself "
+                       "stays in memory, as does the compressed download once offered.")
+            stream_chunk_size = st.number_input("Titles per chunk", min_value=1, value=5000, step=1000,
+                                                key="stream_chunk_size",
+                                                help="Only one chunk of decoded titles and results is held in memory at a time")
+        with st.expander("🏆 Best per Media Item"):
+            st.caption("Groups the titles RTN would keep by parsed title, year, season and episode.")
+            top_k = st.number_input("Titles kept per media item", min_value=1, value=3)
+        with st.expander("🔀 Diff Settings"):
+            st.caption("Ranks the titles with the current settings (A) and the settings below (B), and lists only "
+                       "the titles whose fetch decision or kept flag flips, or whose position moves materially. "
+                       "Both sides use the current Remove Trash option.")
+            diff_settings_file = st.file_uploader("Settings B JSON (from Import/Export)", type=['json'],
+                                                  key="diff_settings_file")
+            diff_conf = st.text_input("...or a conf blob or app URL", key="diff_conf")
+            diff_min_shift = st.number_input(
+                "Minimum position shift", min_value=0, value=0,
+                help="Position change in the corpus sorted by rank that counts as material. 0 uses 5% of the titles."
+            )
+        submit = st.form_submit_button('📊 Rank Titles')
+
+    if submit and mode == "stream":
+        conf = st.session_state.conf
+        if uploaded_file is not None:
+            # Read the upload lazily instead of decoding it as a whole
+            lines = io.TextIOWrapper(uploaded_file, encoding='utf-8', errors='replace', newline='')
+            titles = iter_title_file(lines, uploaded_file.name)
+            total_size = max(uploaded_file.size, 1)
+            progress_of = lambda ranked: min(uploaded_file.tell() / total_size, 1.0)
+        else:
+            pasted_lines = pasted_titles.splitlines()
+            titles = iter_title_lines(pasted_lines)
+            progress_of = lambda ranked: min(ranked / max(len(pasted_lines), 1), 1.0)
+        try:
+            stream_rank_corpus(titles, get_compiled_settings(conf['settings_model']),
+                               remove_trash=conf['remove_trash'], chunk_size=int(stream_chunk_size),
+                               progress_of=progress_of)
+        except Exception as err:
+            st.error(f"❌ Error ranking titles: {str(err)}")
+        finally:
+            if uploaded_file is not None:
+                # Leave the upload open for the next script runs
+                lines.detach()
+    elif submit:
+        try:
+            if uploaded_file is not None:
+                titles = read_uploaded_titles(uploaded_file)
+            else:
+                titles = read_title_lines(pasted_titles.splitlines())
+        except Exception as err:
+            st.error(f"❌ Error reading titles: {str(err)}")
+            titles = []
+
+        if titles:
+            conf = st.session_state.conf
+            compiled = get_compiled_settings(conf['settings_model'])
+
+            parallel_stats = None
+            dedupe_stats = None
+            started = time.perf_counter()
+            with st.spinner(f"Ranking {len(titles):,} titles..."):
+                if mode == "media":
+                    rows = top_per_media(compiled.rtn, titles, k=int(top_k),
+                                         remove_trash=conf['remove_trash'],
+                                         speed_mode=compiled.speed_mode)
+                elif mode == "diff":
                     try:
-                        st.markdown("### 📊 Additional Information")
-                        additional_info = {
-                            "Seeders": torrent.seeders or "N/A",
-                            "Leechers": torrent.leechers or "N/A",
-                            "Infohash": torrent.infohash,
-                        }
-                        
-                        for label, value in additional_info.items():
-                            st.markdown(f"**{label}:** {value}")
-                            
-                        if torrent.trackers:
-                            st.markdown("### 🌐 Trackers")
-                            for tracker in torrent.trackers:
-                                st.markdown(f"- {tracker}")
+                        compiled_b = get_compiled_settings(read_diff_settings(diff_settings_file, diff_conf))
                     except Exception as err:
-                        st.error(f"❌ Error displaying additional info: {str(err)}")
+                        st.error(f"❌ Invalid settings B: {str(err)}")
+                        return
+                    rows = diff_settings(compiled, compiled_b, titles, remove_trash=conf['remove_trash'],
+                                         min_shift=int(diff_min_shift) or None)
+                elif mode == "profiles":
+                    compiled_profiles = {
+                        profile: get_compiled_settings(conf['settings_model'], profile)
+                        for profile in RANK_PROFILES
+                    }
+                    rows = compare_profiles(compiled_profiles, titles, remove_trash=conf['remove_trash'])
+                elif parallel:
+                    rows, parallel_stats = rank_titles_parallel(conf['settings_model'], titles,
+                                                                remove_trash=conf['remove_trash'],
+                                                                workers=int(workers),
+                                                                chunk_size=int(chunk_size),
+                                                                dedupe=dedupe, normalize=dedupe_normalize)
+                    if dedupe:
+                        dedupe_stats = parallel_stats
+                elif dedupe:
+                    rows, dedupe_stats = rank_titles_deduped(compiled.rtn, titles, normalize=dedupe_normalize,
+                                                             remove_trash=conf['remove_trash'],
+                                                             speed_mode=compiled.speed_mode)
+                else:
+                    rows = rank_titles(compiled.rtn, titles,
+                                       remove_trash=conf['remove_trash'],
+                                       speed_mode=compiled.speed_mode)
+            discard_corpus_results()
+            st.session_state['corpus_results'] = {
+                "mode": mode,
+                "rows": rows,
+                "elapsed": time.perf_counter() - started,
+                "parallel_stats": parallel_stats,
+                "dedupe_stats": dedupe_stats
+            }
+        else:
+            st.warning("⚠️ No titles to rank")
+
+    results = st.session_state.get('corpus_results')
+    if not results:
+        return
+    if results['mode'] == "profiles":
+        render_profile_comparison(results)
+        return
+    if results['mode'] == "diff":
+        render_settings_diff(results)
+        return
+    if results['mode'] == "media":
+        render_media_winners(results)
+        return
+
+    rows = results['rows']
+    counts = results.get('counts') or count_results(rows)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Titles", f"{counts['titles']:,}")
+    with col2:
+        st.metric("Fetched", f"{counts['fetched']:,}")
+    with col3:
+        st.metric("Kept", f"{counts['kept']:,}")
+    with col4:
+        st.metric("Titles/s", f"{counts['titles'] / max(results['elapsed'], 1e-9):,.0f}")
+    render_slow_patterns_warning(counts['slow'])
+    dedupe_stats = results.get('dedupe_stats')
+    if dedupe_stats:
+        st.caption(f"🧬 Ranked {dedupe_stats['distinct']:,} distinct titles for {dedupe_stats['titles']:,} titles, "
+                   f"a dedupe ratio of {dedupe_stats['dedupe_ratio']:.0%}")
+
+    if results['mode'] == "stream":
+        render_stream_download(results)
+
+    st.dataframe(
+        rows,
+        use_container_width=True,
+        hide_index=True,
+        column_order=RESULT_COLUMNS,
+        column_config={
+            "raw_title": st.column_config.TextColumn("Raw Title"),
+            "correct_title": st.column_config.TextColumn("Correct Title"),
+            "parsed_title": st.column_config.TextColumn("Parsed Title"),
+            "rank": st.column_config.NumberColumn("Rank"),
+            "fetch": st.column_config.CheckboxColumn("Fetch"),
+            "kept": st.column_config.CheckboxColumn("Kept", help="Whether RTN would keep the title"),
+            "lev_ratio": st.column_config.NumberColumn("Title Similarity", format="%.2f"),
+            "resolution": st.column_config.TextColumn("Resolution"),
+            "failing_reason": st.column_config.TextColumn("Failing Reason"),
+            "slow_patterns": st.column_config.TextColumn(
+                "Slow Patterns", help="Patterns skipped for this title, they ran over the time budget on it"),
+        }
+    )
+
+    parallel_stats = results.get('parallel_stats')
+    if parallel_stats:
+        with st.expander("👷 Worker Utilisation"):
+            st.markdown(
+                f"**{parallel_stats['titles']:,}** titles in **{parallel_stats['chunks']:,}** chunks, "
+                f"**{parallel_stats['titles_per_second']:,.0f}** titles/s over {parallel_stats['elapsed']:.2f}s "
+                "(including worker startup)"
+            )
+            st.dataframe(
+                # Percentages, the progress column format applies to the raw value
+                [{**worker, "utilisation": worker['utilisation'] * 100} for worker in parallel_stats['workers']],
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "worker": st.column_config.TextColumn("Worker PID"),
+                    "titles": st.column_config.NumberColumn("Titles"),
+                    "busy": st.column_config.NumberColumn("Busy (s)", format="%.2f"),
+                    "utilisation": st.column_config.ProgressColumn(
+                        "Utilisation", min_value=0.0, max_value=100.0, format="%.0f%%"),
+                }
+            )
+
+    with st.expander("🔬 Verify Scores"):
+        st.markdown("""
+        Ranks are computed for all titles at once as a feature matrix × rank weight product.
+        Verification re-ranks every title one by one with RTN and compares the results.
+        """)
+        use_reference = st.checkbox("Use the built-in reference corpus instead of the titles above")
+        if st.button("🔬 Run Verification"):
+            if use_reference:
+                raw_titles = [raw_title for raw_title, _ in load_reference_titles()]
+            else:
+                raw_titles = [row['raw_title'] for row in rows if row['rank'] is not None]
+            compiled = get_compiled_settings(st.session_state.conf['settings_model'])
+            parsed = [parse_cache.parse(raw_title) for raw_title in raw_titles]
+            mismatches = verify_scores(parsed, compiled.settings, compiled.ranking_model)
+            if mismatches:
+                st.error(f"❌ {len(mismatches):,} of {len(parsed):,} scores differ from RTN")
+                st.dataframe(mismatches, use_container_width=True, hide_index=True)
+            else:
+                st.success(f"✅ All {len(parsed):,} scores match RTN")
+
+
+def count_results(rows):
+    return {
+        "titles": len(rows),
+        "fetched": sum(1 for row in rows if row['fetch']),
+        "kept": sum(1 for row in rows if row['kept']),
+        "slow": sum(1 for row in rows if row['slow_patterns'])
+    }
+
+
+def discard_corpus_results():
+    """Drop the corpus results of the session, with the results file of a streamed corpus."""
+    previous = st.session_state.pop('corpus_results', None)
+    if previous and previous.get('path') and os.path.exists(previous['path']):
+        os.remove(previous['path'])
+
+
+def sweep_stream_results(max_age=STREAM_RESULTS_MAX_AGE):
+    """Remove streamed results files older than `max_age` seconds, left behind by sessions that ended."""
+    cutoff = time.time() - max_age
+    for path in glob.glob(os.path.join(tempfile.gettempdir(), "rtn_results_*.jsonl.gz")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            # Removed by another session in the meantime
+            pass
+
+
+def stream_rank_corpus(titles, compiled, *, remove_trash, chunk_size, progress_of):
+    """Rank titles chunk by chunk into a gzipped JSONL file, showing progress and throughput.
+
+    Only the counts and the first rows are kept in the session, so the ranking
+    itself holds one chunk at a time. The input is not covered by that bound: an
+    upload is kept in memory by streamlit as a whole, only its decoding is lazy.
+    `progress_of(ranked)` returns the fraction of the input consumed so far. The
+    results file is removed again if ranking fails, or when the session ranks
+    another corpus; files abandoned by ended sessions are swept by age.
+    """
+    discard_corpus_results()
+    sweep_stream_results()
+
+    fd, path = tempfile.mkstemp(prefix="rtn_results_", suffix=".jsonl.gz")
+    counts = {"titles": 0, "fetched": 0, "kept": 0, "slow": 0}
+    preview = []
+    progress = st.progress(0.0, text="Ranking titles...")
+    started = time.perf_counter()
+    completed = False
+    try:
+        with gzip.open(os.fdopen(fd, 'wb'), 'wt', encoding='utf-8') as output:
+            for rows in iter_ranked_chunks(compiled.rtn, titles, chunk_size=chunk_size,
+                                           remove_trash=remove_trash, speed_mode=compiled.speed_mode):
+                output.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+                preview.extend(rows[:STREAM_PREVIEW_ROWS - len(preview)])
+                for key, value in count_results(rows).items():
+                    counts[key] += value
+                elapsed = time.perf_counter() - started
+                progress.progress(
+                    progress_of(counts['titles']),
+                    text=f"{counts['titles']:,} titles ranked, {counts['titles'] / max(elapsed, 1e-9):,.0f} titles/s"
+                )
+        completed = True
+    finally:
+        progress.empty()
+        if not completed:
+            os.remove(path)
+
+    st.session_state['corpus_results'] = {
+        "mode": "stream",
+        "rows": preview,
+        "counts": counts,
+        "path": path,
+        "elapsed": time.perf_counter() - started,
+        "parallel_stats": None
+    }
+
+
+def render_stream_download(results):
+    st.caption(f"Showing the first {len(results['rows']):,} of {results['counts']['titles']:,} titles, "
+               "download the results for all of them.")
+    if not os.path.exists(results['path']):
+        st.warning("⚠️ The results file is gone, rank the titles again")
+        return
+    # Streamlit reads the whole file and serves the download from memory, for as long as
+    # the button is on the page. Only the gzip compression keeps that small
+    with open(results['path'], 'rb') as f:
+        st.download_button("💾 Download Results (JSONL)", data=f, file_name="rtn_results.jsonl.gz",
+                           mime="application/gzip")
+
+
+def render_slow_patterns_warning(slow_rows):
+    if slow_rows:
+        st.warning(f"🐢 {slow_rows:,} titles were ranked without patterns running over {PATTERN_TIMEOUT}s on them, "
+                   "see the Slow Patterns column")
+
+
+def render_media_winners(results):
+    grouped = results['rows']
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Titles", f"{grouped['titles']:,}")
+    with col2:
+        st.metric("Candidates", f"{grouped['candidates']:,}", help="Titles RTN would keep")
+    with col3:
+        st.metric("Media Items", f"{grouped['groups']:,}")
+    with col4:
+        st.metric("Titles/s", f"{grouped['titles'] / max(results['elapsed'], 1e-9):,.0f}")
+    render_slow_patterns_warning(grouped['slow'])
+
+    rows = grouped['rows']
+    if st.checkbox("Only show the winner of each media item", value=True):
+        rows = [row for row in rows if row['place'] == 1]
+    st.dataframe(
+        rows,
+        use_container_width=True,
+        hide_index=True,
+        column_order=MEDIA_COLUMNS,
+        column_config={
+            "media": st.column_config.TextColumn("Media Item"),
+            "place": st.column_config.NumberColumn("Place"),
+            "raw_title": st.column_config.TextColumn("Raw Title"),
+            "rank": st.column_config.NumberColumn("Rank"),
+            "resolution": st.column_config.TextColumn("Resolution"),
+            "candidates": st.column_config.NumberColumn("Candidates", help="Titles kept for this media item"),
+            "correct_title": st.column_config.TextColumn("Correct Title"),
+            "parsed_title": st.column_config.TextColumn("Parsed Title"),
+            "slow_patterns": st.column_config.TextColumn(
+                "Slow Patterns", help="Patterns skipped for this title, they ran over the time budget on it"),
+        }
+    )
+
+
+def render_settings_diff(results):
+    diff = results['rows']
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Titles", f"{diff.titles:,}")
+    with col2:
+        st.metric("Fetch Flips", f"{sum(1 for row in diff.rows if row['change'] == 'fetch flips'):,}",
+                  help="Titles fetched by one side only")
+    with col3:
+        st.metric("Kept Flips", f"{sum(1 for row in diff.rows if row['change'] == 'kept flips'):,}",
+                  help="Titles fetched by both sides but kept by one only, e.g. over the rank threshold")
+    with col4:
+        st.metric("Material Moves", f"{sum(1 for row in diff.rows if row['change'].startswith('moves')):,}",
+                  help=f"Titles whose position in the corpus moved by {diff.min_shift:,} or more")
+    st.caption(f"Ranked both sides in {results['elapsed']:.2f}s. "
+               + (f"{diff.errors:,} titles could not be ranked." if diff.errors else ""))
+    render_slow_patterns_warning(diff.slow)
+
+    if diff.reasons:
+        st.subheader("Failure Reasons")
+        st.dataframe(
+            diff.reasons,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "reason": st.column_config.TextColumn("Reason"),
+                "titles_a": st.column_config.NumberColumn("Titles (A)", help="Titles failing for it with the current settings"),
+                "titles_b": st.column_config.NumberColumn("Titles (B)", help="Titles failing for it with settings B"),
+                "delta": st.column_config.NumberColumn("Delta"),
+            }
+        )
+
+    if not diff.rows:
+        st.success("✅ No title changes fate with settings B")
+        return
+    st.subheader("Changed Titles")
+    st.dataframe(
+        diff.rows,
+        use_container_width=True,
+        hide_index=True,
+        column_order=DIFF_COLUMNS,
+        column_config={
+            "raw_title": st.column_config.TextColumn("Raw Title"),
+            "correct_title": st.column_config.TextColumn("Correct Title"),
+            "parsed_title": st.column_config.TextColumn("Parsed Title"),
+            "change": st.column_config.TextColumn("Change"),
+            "rank_a": st.column_config.NumberColumn("Rank (A)"),
+            "rank_b": st.column_config.NumberColumn("Rank (B)"),
+            "position_a": st.column_config.NumberColumn("Position (A)"),
+            "position_b": st.column_config.NumberColumn("Position (B)"),
+            "position_shift": st.column_config.NumberColumn(
+                "Position Shift", help="Positions moved from A to B, negative when the title moves up"),
+            "fetch_a": st.column_config.CheckboxColumn("Fetch (A)"),
+            "fetch_b": st.column_config.CheckboxColumn("Fetch (B)"),
+            "kept_a": st.column_config.CheckboxColumn("Kept (A)"),
+            "kept_b": st.column_config.CheckboxColumn("Kept (B)"),
+            "failing_reason_a": st.column_config.TextColumn("Failing Reason (A)"),
+            "failing_reason_b": st.column_config.TextColumn("Failing Reason (B)"),
+            "slow_patterns_a": st.column_config.TextColumn(
+                "Slow Patterns (A)", help="Patterns of the current settings skipped for this title, they ran over the time budget on it"),
+            "slow_patterns_b": st.column_config.TextColumn(
+                "Slow Patterns (B)", help="Patterns of settings B skipped for this title, they ran over the time budget on it"),
+        }
+    )
+
+
+def render_profile_comparison(results):
+    rows = results['rows']
+    ranked_rows = [row for row in rows if row['position_shift'] is not None]
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Titles", f"{len(rows):,}")
+    with col2:
+        st.metric("Order Changes", f"{sum(1 for row in ranked_rows if row['position_shift']):,}",
+                  help="Titles whose position in the ranked corpus differs between profiles")
+    with col3:
+        st.metric("Kept Divergences", f"{sum(1 for row in ranked_rows if row['kept_diverges']):,}",
+                  help="Titles kept by some profiles but dropped by others")
+    with col4:
+        st.metric("Titles/s", f"{len(rows) / max(results['elapsed'], 1e-9):,.0f}")
+    render_slow_patterns_warning(sum(1 for row in rows if row['slow_patterns']))
+
+    only_divergent = st.checkbox("Only show titles where the profiles diverge", value=True)
+    if only_divergent:
+        rows = [row for row in ranked_rows if row['position_shift'] or row['kept_diverges']]
+
+    column_config = {
+        "raw_title": st.column_config.TextColumn("Raw Title"),
+        "parsed_title": st.column_config.TextColumn("Parsed Title"),
+        "position_shift": st.column_config.NumberColumn(
+            "Position Shift", help="Largest difference in corpus position between profiles"),
+        "kept_diverges": st.column_config.CheckboxColumn("Kept Diverges"),
+        "fetch": st.column_config.CheckboxColumn("Fetch"),
+        "failing_reason": st.column_config.TextColumn("Failing Reason"),
+        "slow_patterns": st.column_config.TextColumn(
+            "Slow Patterns", help="Patterns skipped for this title, they ran over the time budget on it"),
+    }
+    for profile in RANK_PROFILES:
+        column_config[f"rank_{profile}"] = st.column_config.NumberColumn(f"Rank ({profile})")
+        column_config[f"position_{profile}"] = st.column_config.NumberColumn(f"Position ({profile})")
+        column_config[f"kept_{profile}"] = st.column_config.CheckboxColumn(f"Kept ({profile})")
+
+    st.dataframe(
+        rows,
+        use_container_width=True,
+        hide_index=True,
+        column_order=profile_columns(RANK_PROFILES),
+        column_config=column_config
+    )
+
+
+def render_performance_sidebar():
+    with st.sidebar:
+        st.markdown("---")
+        with st.expander("⚡ Performance"):
+            cache_size = st.number_input(
+                "Parse cache size",
+                min_value=0,
+                value=parse_cache.maxsize,
+                step=1000,
+                help="Number of parsed titles kept in memory, shared by all sessions. 0 disables the cache."
+            )
+            if cache_size != parse_cache.maxsize:
+                parse_cache.resize(cache_size)
+
+            stats = parse_cache.stats()
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Cache hits", f"{stats['hits']:,}")
+                st.metric("Cached titles", f"{stats['size']:,}")
+            with col2:
+                st.metric("Cache misses", f"{stats['misses']:,}")
+                st.metric("Hit rate", f"{stats['hit_rate']:.0%}")
+
+            decode_stats = conf_decode_stats()
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("URL conf decodes", f"{decode_stats['decodes']:,}")
+                st.metric("Last decode", f"{decode_stats['last'] * 1e3:,.1f} ms")
+            with col2:
+                st.metric("Decodes skipped", f"{decode_stats['skips']:,}",
+                          help="Reruns where the URL conf was unchanged and not decoded again")
+                mean = decode_stats['seconds'] / decode_stats['decodes'] if decode_stats['decodes'] else 0.0
+                st.metric("Mean decode", f"{mean * 1e3:,.1f} ms")
+
+            write_stats = conf_write_stats()
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("URL conf writes", f"{write_stats['writes']:,}")
+            with col2:
+                st.metric("Writes skipped", f"{write_stats['skips']:,}",
+                          help="Saves where the configuration had not changed since the last URL write")
+
+            if st.button("🧹 Clear parse cache"):
+                parse_cache.clear()
+                st.rerun()
+
+
+def render_timing_panel(timer, total):
+    """Time spent in each stage of this rerun, stages listed in the order they started."""
+    records = sorted(timer.records, key=lambda record: record['offset'])
+    rows = [
+        {
+            "stage": "· " * record['depth'] + record['stage'],
+            "case": record['case'],
+            "ms": record['seconds'] * 1e3,
+            # Percentage, the progress column format applies to the raw value
+            "share": record['seconds'] / total * 100 if total else 0.0
+        }
+        for record in records
+    ]
+    with st.sidebar:
+        with st.expander("⏱️ Rerun Timing", expanded=True):
+            st.metric("Total", f"{total * 1e3:,.1f} ms")
+            for record in records:
+                if record['stage'] == "render_title":
+                    st.caption(f"{record['case']}: {record['seconds'] * 1e3:,.1f} ms")
+            st.dataframe(
+                rows,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "stage": st.column_config.TextColumn("Stage"),
+                    "case": st.column_config.TextColumn("Test Case"),
+                    "ms": st.column_config.NumberColumn("Time (ms)", format="%.1f"),
+                    "share": st.column_config.ProgressColumn(
+                        "Share", min_value=0.0, max_value=100.0, format="%.0f%%"),
+                }
+            )
+            st.caption("Nested stages are included in the stages above them. "
+                       "Cached settings skip get_settings_model and RTN construction.")
+
+            cold_start = startup.report()
+            st.markdown("**Cold start of this process**")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("First paint", f"{(cold_start['first_paint_s'] or 0) * 1e3:,.0f} ms")
+            with col2:
+                st.metric("Ready", f"{(cold_start['ready_s'] or 0) * 1e3:,.0f} ms",
+                          help="End of the first script run")
+            st.dataframe(
+                [{"module": row["module"], "ms": row["seconds"] * 1e3} for row in cold_start["imports"]],
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "module": st.column_config.TextColumn("Import"),
+                    "ms": st.column_config.NumberColumn("Time (ms)", format="%.0f"),
+                }
+            )
 
 
 def render_preset_profiles():
@@ -1603,7 +2087,7 @@ def render_import_export():
         with col1:
             # Export button and functionality
             if st.button("📤 Export Settings"):
-                settings_model = get_settings_model(st.session_state.conf['settings_model'])
+                settings_model = get_compiled_settings(st.session_state.conf['settings_model']).settings
                 settings_json = settings_model.model_dump_json(indent=2)
                 
                 # Create a download button for the JSON file
@@ -1641,7 +2125,7 @@ def render_import_export():
         """)
         
         # Get current settings as formatted JSON
-        settings_model = get_settings_model(st.session_state.conf['settings_model'])
+        settings_model = get_compiled_settings(st.session_state.conf['settings_model']).settings
         current_settings_json = settings_model.model_dump_json(indent=2)
         
         # Create an editable JSON area
@@ -1668,34 +2152,104 @@ def render_import_export():
             st.json(settings_model.model_dump())
 
 
-# Main content based on navigation
-if page == "Settings":
-    render_settings()
-elif page == "Test Titles":
+def add_test_case():
+    st.session_state.conf['titles'].append({
+        "raw_title": "",
+        "correct_title": ""
+    })
+    save_conf_to_query_params()
+    # Show the page holding the new test case
+    st.session_state['titles_view'] = "Detailed"
+    st.session_state['titles_page'] = math.ceil(len(st.session_state.conf['titles']) / st.session_state['titles_page_size'])
+
+
+def render_test_titles():
     st.header("🧪 Test Your Titles")
     st.markdown("""
     Test how your titles rank with the current settings. Add multiple test cases to compare results.
     """)
-    
-    for index, section in enumerate(st.session_state.conf['titles']):
-        initial_raw_title = section['raw_title']
-        initial_correct_title = section['correct_title']
-
-        render_title(
-            conf=st.session_state.conf,
-            index=index,
-            initial_raw_title=initial_raw_title,
-            initial_correct_title=initial_correct_title
-        )
 
-    if st.button("➕ Add Test Case"):
-        st.session_state.conf['titles'].append({
-            "raw_title": "",
-            "correct_title": ""
-        })
-        save_conf_to_query_params()
-        
-elif page == "Preset Profiles":
-    render_preset_profiles()
-elif page == "Import/Export":
-    render_import_export()
+    titles = st.session_state.conf['titles']
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        view = st.radio("View", ["Detailed", "Compact"], horizontal=True, key="titles_view",
+                        help="Compact shows one summary row per test case instead of the full editor")
+    with col2:
+        page_size = st.selectbox("Test cases per page", TITLES_PAGE_SIZES, key="titles_page_size")
+    pages = max(math.ceil(len(titles) / page_size), 1)
+    # The page may be gone after deleting test cases or growing the page size
+    if st.session_state.get('titles_page', 1) > pages:
+        st.session_state['titles_page'] = pages
+    with col3:
+        page_number = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key="titles_page")
+
+    first = (page_number - 1) * page_size
+    window = range(first, min(first + page_size, len(titles)))
+    st.caption(f"Test cases {window.start + 1 if window else 0}–{window.stop} of {len(titles)}")
+
+    if view == "Compact":
+        render_test_titles_summary(titles, window)
+    else:
+        for index in window:
+            section = titles[index]
+            with timer.stage("render_title", case=f"Test Case #{index + 1}"):
+                render_title(
+                    conf=st.session_state.conf,
+                    index=index,
+                    initial_raw_title=section['raw_title'],
+                    initial_correct_title=section['correct_title']
+                )
+
+    st.button("➕ Add Test Case", on_click=add_test_case)
+
+
+def render_test_titles_summary(titles, window):
+    """One row per test case of the page, ranked in a single batch."""
+    indices = [index for index in window if titles[index]['raw_title']]
+    compiled = get_compiled_settings(st.session_state.conf['settings_model'])
+    with timer.stage("rank_titles"):
+        ranked = rank_titles(compiled.rtn,
+                             [(titles[index]['raw_title'], titles[index]['correct_title']) for index in indices],
+                             remove_trash=st.session_state.conf['remove_trash'],
+                             speed_mode=compiled.speed_mode)
+    rows = [{"case": index + 1, **row} for index, row in zip(indices, ranked)]
+    st.dataframe(
+        rows,
+        use_container_width=True,
+        hide_index=True,
+        column_order=["case", "raw_title", "correct_title", "rank", "fetch", "kept", "failing_reason"],
+        column_config={
+            "case": st.column_config.NumberColumn("#"),
+            "raw_title": st.column_config.TextColumn("Raw Title"),
+            "correct_title": st.column_config.TextColumn("Correct Title"),
+            "rank": st.column_config.NumberColumn("Rank"),
+            "fetch": st.column_config.CheckboxColumn("Fetch"),
+            "kept": st.column_config.CheckboxColumn("Kept", help="Whether RTN would keep the title"),
+            "failing_reason": st.column_config.TextColumn("Failing Reason"),
+        }
+    )
+
+
+# Main content based on navigation
+with timer.stage(f"render {page}"):
+    if page == "Settings":
+        render_settings()
+    elif page == "Test Titles":
+        render_test_titles()
+    elif page == "Rank Corpus":
+        render_rank_corpus()
+    elif page == "Preset Profiles":
+        render_preset_profiles()
+    elif page == "Import/Export":
+        render_import_export()
+
+# Write the configuration to the URL once, after every change of this rerun
+with timer.stage("flush_conf_to_query_params"):
+    flush_conf_to_query_params()
+
+render_performance_sidebar()
+if startup.mark_ready():
+    print(startup.summary(), file=sys.stderr)
+    sweep_stream_results()
+if timer.enabled:
+    render_timing_panel(timer, time.perf_counter() - rerun_started)
@@ -0,0 +1,46 @@
+"""The combined scan of `PatternMatcher` must find what a separate `finditer` per pattern does."""
+import unittest
+
+from benchmark import DEFAULT_PATTERNS
+from rtn_engine import _finditer, load_reference_titles, pattern_matcher
+
+# Pattern lists and texts where combining patterns is easy to get wrong
+EDGE_CASES = [
+    (("(a)b", "(x)?(?(1)y|z)"), "xy zz ab"),
+    (("(a)b", "(?P<q>x)?(?(q)y|z)"), "xy zz ab"),
+    (("(a)b", "(x)\\1"), "xx ab"),
+    (("(a)b", "(?P<q>x)(?P=q)"), "xx ab"),
+    (("a", "(?i)A"), "aA"),
+    (("b", "a*"), "bab"),
+    (("/SPARKS/", "sparks"), "Sparks SPARKS"),
+    # Match resets and backtracking control verbs break the patterns after them
+    (("a\\Kb", "ab"), "ab aab b"),
+    (("x", "a\\Kb"), "ab aab b"),
+    (("a+(*SKIP)x", "ab"), "aab"),
+    (("a(*PRUNE)x", "ab"), "ab"),
+]
+
+
+class PatternMatcherTest(unittest.TestCase):
+    def assertSameMatches(self, patterns, texts):
+        matcher = pattern_matcher(patterns)
+        for text in texts:
+            for compiled, found in zip(matcher.patterns, matcher.matches(text)):
+                if compiled.regex is not None:
+                    with self.subTest(pattern=compiled.source, text=text):
+                        self.assertEqual(found, _finditer(compiled.regex, text))
+
+    def test_edge_cases(self):
+        for patterns, text in EDGE_CASES:
+            self.assertSameMatches(patterns, [text])
+
+    def test_reference_corpus(self):
+        titles = [raw_title for raw_title, _ in load_reference_titles()]
+        for patterns in DEFAULT_PATTERNS.values():
+            self.assertSameMatches(patterns, titles)
+        # Every edge case pattern in one list, next to the others
+        self.assertSameMatches([pattern for patterns, _ in EDGE_CASES for pattern in patterns], titles)
+
+
+if __name__ == "__main__":
+    unittest.main()